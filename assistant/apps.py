@@ -4,3 +4,14 @@ from django.apps import AppConfig
 class AssistantConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'assistant'
+
+    def ready(self):
+        from assistant.tokenizer import get_encoder
+        from koda.config.logging_config import configure_logger
+
+        # The first encoder load may download its BPE file, which must not
+        # happen later on a consumer's event loop
+        try:
+            get_encoder()
+        except Exception as e:
+            configure_logger(__name__).warning(f"Could not preload tokenizer: {e}")
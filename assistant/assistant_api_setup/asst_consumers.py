@@ -11,7 +11,9 @@ from django.conf import settings
 
 from accounts.models import User
 from assistant.assistant_api_setup.engine import OpenAIChatEngine
+from assistant.assistant_api_setup.thread_pool import get_thread_pool
 from assistant.memory import BaseMemory
+from assistant.persistence import MessageWriteBuffer
 from assistant.tasks import save_conversation
 
 logger = configure_logger(__name__)
@@ -25,9 +27,7 @@ class ChatConsumer(AsyncWebsocketConsumer):
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.chat_engine = OpenAIChatEngine(
-            api_key=settings.OPENAI_API_KEY, assistant_id=settings.ASSISTANT_ID
-        )
+        self.chat_engine = OpenAIChatEngine(assistant_id=settings.ASSISTANT_ID)
 
     async def connect(self):
         """
@@ -42,8 +42,9 @@ class ChatConsumer(AsyncWebsocketConsumer):
 
         self.conversation_memory = BaseMemory()
 
-        # Start a new conversation thread
-        self.thread_id = await self.chat_engine.create_thread()
+        # Take a pre-created conversation thread
+        self.thread_id = await get_thread_pool().take()
+        self.message_buffer = MessageWriteBuffer(thread=self.thread_id)
 
         self.conversation_memory.session_start_time = datetime.now()
         logger.info(
@@ -58,6 +59,12 @@ class ChatConsumer(AsyncWebsocketConsumer):
     async def disconnect(self, close_code):
         logger.info("---------- CONNECTION DISCONNECTED ----------")
 
+        # Persist whatever the buffer still holds, connect may have failed
+        # before creating it
+        message_buffer = getattr(self, "message_buffer", None)
+        if message_buffer is not None:
+            await message_buffer.close()
+
         # Leave room group
         await self.channel_layer.group_discard(self.room_group_name, self.channel_name)
 
@@ -79,13 +86,15 @@ class ChatConsumer(AsyncWebsocketConsumer):
                     citations,
                     message_id,
                 ) = await self.chat_engine.handle_chat(self.thread_id, user_message)
-                self.conversation_memory.add_message(
+                message = self.conversation_memory.add_message(
                     "user", user_message, message_id=message_id
                 )
+                self.message_buffer.add(message)
 
                 stop = time.time()
                 duration = stop - start
 
+                # The engine logs the turn's breakdown as TURN TIMINGS
                 logger.info(f"RESPONSE DURATION: {duration}")
 
                 # Send message to room group
@@ -159,6 +168,7 @@ class ChatConsumer(AsyncWebsocketConsumer):
     async def end_conversation(self):
         # self.conversation = await database_sync_to_async(Conversation.objects.create)()
         self.conversation_memory.session_end_time = datetime.now()
+        await self.message_buffer.flush()
         conversation_memory_dict = self.conversation_memory.to_dict()
         save_conversation.apply_async(
             args=[
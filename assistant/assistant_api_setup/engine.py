@@ -1,30 +1,36 @@
-import asyncio
-from concurrent.futures import ThreadPoolExecutor
-
-# import openai
-from django.conf import settings
-from openai import OpenAI
+import time
 
+from assistant.assistant_api_setup.polling import TurnTimings, poll_run
 from assistant.utils import convert_markdown_to_html
+from koda.config.base_config import get_openai_client
+from koda.config.logging_config import configure_logger
+
+logger = configure_logger(__name__)
 
 
 class OpenAIChatEngine:
-    def __init__(self, api_key, assistant_id):
-        self.client = OpenAI(api_key=api_key)
+    def __init__(self, assistant_id):
         self.assistant_id = assistant_id
+        self.last_turn_timings = None
+
+    @property
+    def client(self):
+        # The pooled async client of the running event loop, shared by every
+        # socket instead of one blocking client per consumer
+        return get_openai_client()
 
     async def upload_file(self, file_path):
         with open(file_path, "rb") as file:
-            return self.client.files.create(file=file, purpose="assistants")
+            return await self.client.files.create(file=file, purpose="assistants")
 
     async def delete_file(self, file_id, assistant_id):
-        self.client.files.delete(file_id=file_id)
-        self.client.beta.assistants.files.delete(
+        await self.client.files.delete(file_id=file_id)
+        await self.client.beta.assistants.files.delete(
             file_id=file_id, assistant_id=assistant_id
         )
 
     async def create_assistant(self, name, instructions, model, tools, file_id):
-        return self.client.beta.assistants.create(
+        return await self.client.beta.assistants.create(
             name=name,
             instructions=instructions,
             model=model,
@@ -33,29 +39,42 @@ class OpenAIChatEngine:
         )
 
     async def attach_file_to_assistant(self, assistant_id, file_id):
-        self.client.beta.assistants.files.create(assistant_id, file_id=file_id)
+        await self.client.beta.assistants.files.create(assistant_id, file_id=file_id)
 
     async def create_thread(self):
-        thread = self.client.beta.threads.create()
+        thread = await self.client.beta.threads.create()
         return thread.id
 
+    async def delete_thread(self, thread_id):
+        await self.client.beta.threads.delete(thread_id)
+
     async def send_message(self, thread_id, message):
-        response = self.client.beta.threads.messages.create(
+        response = await self.client.beta.threads.messages.create(
             thread_id=thread_id, role="user", content=message
         )
         return response.id
 
     async def process_run(self, thread_id, assistant_id):
-        run = self.client.beta.threads.runs.create(
+        return await self.client.beta.threads.runs.create(
             thread_id=thread_id,
             assistant_id=assistant_id,
         )
-        return self.client.beta.threads.runs.retrieve(
-            thread_id=thread_id, run_id=run.id
+
+    async def retrieve_run(self, thread_id, run_id):
+        return await self.client.beta.threads.runs.retrieve(
+            thread_id=thread_id, run_id=run_id
+        )
+
+    async def cancel_run(self, thread_id, run_id):
+        return await self.client.beta.threads.runs.cancel(
+            thread_id=thread_id, run_id=run_id
         )
 
     async def get_messages(self, thread_id):
-        return self.client.beta.threads.messages.list(thread_id=thread_id)
+        # Only the newest message, the reply, is read
+        return await self.client.beta.threads.messages.list(
+            thread_id=thread_id, limit=1
+        )
 
     async def process_annotations(self, messages):
         message_content = messages.data[0].content[0].text
@@ -82,27 +101,37 @@ class OpenAIChatEngine:
         # message_content.value += '\n' + '\n'.join(citations)
         return message_content.value, citations
 
-    async def async_wrapper(func, *args, **kwargs):
-        loop = asyncio.get_event_loop()
-        with ThreadPoolExecutor() as pool:
-            return await loop.run_in_executor(pool, func, *args, **kwargs)
-
-    # async def wait_for_run_completion(self, thread_id, run_id, timeout=30, check_interval=2):
-    async def wait_for_run_completion(self, run, timeout=30, check_interval=2):
+    async def wait_for_run_completion(
+        self, thread_id, run, timings=None, timeout=None
+    ):
         """Wait for the run to complete with a timeout."""
-        elapsed_time = 0
-        while elapsed_time < timeout:
-            if run.status == "completed":
-                return True
-            await asyncio.sleep(check_interval)
-            elapsed_time += check_interval
-        return False
+        run = await poll_run(
+            lambda: self.retrieve_run(thread_id, run.id),
+            run,
+            timings=timings,
+            timeout=timeout,
+            cancel_run=lambda: self.cancel_run(thread_id, run.id),
+        )
+        if run.status != "completed":
+            raise RuntimeError(f"Run {run.id} ended with status {run.status}")
+        return run
 
     async def handle_chat(self, thread_id, message):
+        timings = TurnTimings()
+
+        start_time = time.monotonic()
         message_id = await self.send_message(thread_id, message)
         run = await self.process_run(thread_id, self.assistant_id)
-        await self.wait_for_run_completion(run)
+        timings.send = time.monotonic() - start_time
+
+        await self.wait_for_run_completion(thread_id, run, timings=timings)
+
+        start_time = time.monotonic()
         messages = await self.get_messages(thread_id)
+        timings.fetch = time.monotonic() - start_time
+
+        self.last_turn_timings = timings
+        logger.info(f"TURN TIMINGS: {timings.as_dict()}")
         processed_message, citations = await self.process_annotations(messages)
 
         # Convert Markdown (including handling for newlines) to HTML, then sanitize
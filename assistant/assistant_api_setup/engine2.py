@@ -1,60 +1,94 @@
-import asyncio
+import time
 
-from koda.config.base_config import openai_client as client
 from django.conf import settings
 
+from assistant.assistant_api_setup.polling import TurnTimings, poll_run
+from koda.config.base_config import get_openai_client
+from koda.config.logging_config import configure_logger
+
+logger = configure_logger(__name__)
+
 
 class OpenAIChatEngine:
     def __init__(self):
         self.assistant_id = settings.OPENAI_ASSISTANT_ID
+        self.last_turn_timings = None
 
     async def create_thread(self):
         """Create a new conversation thread."""
-        thread = client.beta.threads.create()
+        thread = await get_openai_client().beta.threads.create()
         return thread.id
 
     async def send_message(self, thread_id, message):
         """Send a message to the specified thread."""
-        user_message = client.beta.threads.messages.create(
+        user_message = await get_openai_client().beta.threads.messages.create(
             thread_id=thread_id, role="user", content=message
         )
         return user_message
 
     async def run_thread(self, thread_id):
         """Run the assistant on the thread."""
-        run = client.beta.threads.runs.create(
+        run = await get_openai_client().beta.threads.runs.create(
             thread_id=thread_id,
             assistant_id=self.assistant_id,
         )
-        return run.id
+        return run
 
-    async def check_status(self, run_id, thread_id):
-        """Check the status of the conversation run."""
-        run = client.beta.threads.runs.retrieve(
+    async def retrieve_run(self, run_id, thread_id):
+        """Fetch the latest state of the conversation run."""
+        return await get_openai_client().beta.threads.runs.retrieve(
+            thread_id=thread_id,
+            run_id=run_id,
+        )
+
+    async def cancel_run(self, run_id, thread_id):
+        """Cancel a run so the thread accepts new runs."""
+        return await get_openai_client().beta.threads.runs.cancel(
             thread_id=thread_id,
             run_id=run_id,
         )
+
+    async def check_status(self, run_id, thread_id):
+        """Check the status of the conversation run."""
+        run = await self.retrieve_run(run_id, thread_id)
         return run.status
 
     async def get_response(self, thread_id):
         """Retrieve the response from the thread."""
-        response = client.beta.threads.messages.list(thread_id=thread_id)
+        response = await get_openai_client().beta.threads.messages.list(
+            thread_id=thread_id, limit=1
+        )
         if response.data:
             return response.data[0].content[0].text.value
         return ""
 
     async def handle_chat(self, thread_id, user_input):
         """Handle the entire chat process."""
+        timings = TurnTimings()
+
+        start_time = time.monotonic()
         thread_message = await self.send_message(thread_id, user_input)
         message_id = thread_message.id
-
-        run_id = await self.run_thread(thread_id)
+        run = await self.run_thread(thread_id)
+        timings.send = time.monotonic() - start_time
 
         # Wait for the response
-        while await self.check_status(run_id, thread_id) != "completed":
-            await asyncio.sleep(1)  # Implement a more efficient waiting mechanism
+        run = await poll_run(
+            lambda: self.retrieve_run(run.id, thread_id),
+            run,
+            timings=timings,
+            cancel_run=lambda: self.cancel_run(run.id, thread_id),
+        )
+        if run.status != "completed":
+            raise RuntimeError(f"Run {run.id} ended with status {run.status}")
+
+        start_time = time.monotonic()
+        response = await self.get_response(thread_id)
+        timings.fetch = time.monotonic() - start_time
 
-        return await self.get_response(thread_id), message_id
+        self.last_turn_timings = timings
+        logger.info(f"TURN TIMINGS: {timings.as_dict()}")
+        return response, message_id
 
 
 # Example usage
@@ -0,0 +1,95 @@
+import asyncio
+import random
+import time
+
+from django.conf import settings
+
+from koda.config.logging_config import configure_logger
+
+logger = configure_logger(__name__)
+
+PENDING_RUN_STATUSES = {"queued", "in_progress", "cancelling"}
+
+
+class TurnTimings:
+    """
+    Latency breakdown of one chat turn, in seconds. Queue and run times are
+    observed by polling, so they are accurate to the current poll interval.
+    """
+
+    __slots__ = ("send", "queue", "run", "fetch", "polls")
+
+    def __init__(self):
+        self.send = self.queue = self.run = self.fetch = 0.0
+        self.polls = 0
+
+    @property
+    def total(self):
+        return self.send + self.queue + self.run + self.fetch
+
+    def as_dict(self):
+        return {
+            "send": round(self.send, 3),
+            "queue": round(self.queue, 3),
+            "run": round(self.run, 3),
+            "fetch": round(self.fetch, 3),
+            "total": round(self.total, 3),
+            "polls": self.polls,
+        }
+
+
+def iter_poll_delays(initial_delay, max_delay, factor=2):
+    """Exponential backoff with full jitter, capped at `max_delay`."""
+    delay = initial_delay
+    while True:
+        yield random.uniform(0, delay)
+        delay = min(delay * factor, max_delay)
+
+
+async def poll_run(retrieve_run, run, timings=None, timeout=None, cancel_run=None):
+    """Polls a run until it leaves the queued and in-progress states.
+
+    Runs usually finish within a few hundred milliseconds to a few seconds, so
+    polling starts fast and backs off instead of sleeping a fixed interval.
+
+    Args:
+        retrieve_run (callable): Coroutine function returning the latest run.
+        run: The run as returned when it was created.
+        timings (TurnTimings): Filled with the queue and run durations.
+        timeout (float): Seconds to wait before giving up.
+        cancel_run (callable): Coroutine function cancelling the run, awaited
+            before giving up. A run left active keeps its thread locked, and
+            threads go back to the pool for later turns.
+
+    Returns:
+        The run in its final state.
+    """
+    timeout = timeout or settings.ASSISTANT_RUN_TIMEOUT
+    start_time = last_status_change = time.monotonic()
+    delays = iter_poll_delays(
+        settings.ASSISTANT_POLL_INITIAL_DELAY, settings.ASSISTANT_POLL_MAX_DELAY
+    )
+
+    while run.status in PENDING_RUN_STATUSES:
+        if time.monotonic() - start_time > timeout:
+            if cancel_run is not None:
+                try:
+                    await cancel_run()
+                except Exception as e:
+                    logger.warning(f"Could not cancel run {run.id}: {e}")
+            raise TimeoutError(f"Run {run.id} still {run.status} after {timeout}s")
+
+        await asyncio.sleep(next(delays))
+        previous_status = run.status
+        run = await retrieve_run()
+        now = time.monotonic()
+
+        if timings is not None:
+            timings.polls += 1
+            if previous_status == "queued" and run.status != "queued":
+                timings.queue = now - last_status_change
+                last_status_change = now
+            if run.status not in PENDING_RUN_STATUSES:
+                timings.run = now - last_status_change
+
+    return run
@@ -0,0 +1,195 @@
+import asyncio
+import json
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+
+from django.conf import settings
+
+from assistant.assistant_api_setup.engine import OpenAIChatEngine
+from koda.config.base_config import get_redis_client, loop_local
+from koda.config.logging_config import configure_logger
+
+logger = configure_logger(__name__)
+
+POOL_KEY = "assistant-thread-pool"
+REFILL_LOCK_KEY = "assistant-thread-pool-refill"
+REFILL_LOCK_TIMEOUT = 60  # seconds, outlives a refill's thread creations
+
+
+class LocalThreadStore:
+    """Pool entries kept in this process, used when REDIS_URL is not set."""
+
+    def __init__(self):
+        self.entries = deque()
+
+    async def pop(self):
+        return self.entries.popleft() if self.entries else None
+
+    async def peek(self):
+        return self.entries[0] if self.entries else None
+
+    async def push(self, entries):
+        self.entries.extend(entries)
+
+    async def push_front(self, entry):
+        self.entries.appendleft(entry)
+
+    async def count(self):
+        return len(self.entries)
+
+    @asynccontextmanager
+    async def refill_lock(self):
+        # The pool's single refill task already serializes refills
+        yield True
+
+
+class RedisThreadStore:
+    """Pool entries in a Redis list shared by every Daphne process."""
+
+    def __init__(self, redis):
+        self.redis = redis
+
+    async def pop(self):
+        raw = await self.redis.lpop(POOL_KEY)
+        return json.loads(raw) if raw else None
+
+    async def peek(self):
+        raw = await self.redis.lindex(POOL_KEY, 0)
+        return json.loads(raw) if raw else None
+
+    async def push(self, entries):
+        await self.redis.rpush(POOL_KEY, *[json.dumps(entry) for entry in entries])
+
+    async def push_front(self, entry):
+        await self.redis.lpush(POOL_KEY, json.dumps(entry))
+
+    async def count(self):
+        return await self.redis.llen(POOL_KEY)
+
+    @asynccontextmanager
+    async def refill_lock(self):
+        from redis.exceptions import LockError
+
+        # Every process refills the shared list, only one may at a time or
+        # the pool grows to processes x size
+        lock = self.redis.lock(REFILL_LOCK_KEY, timeout=REFILL_LOCK_TIMEOUT)
+        acquired = await lock.acquire(blocking=False)
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                try:
+                    await lock.release()
+                except LockError:
+                    # Expired while refilling, another process may hold it now
+                    pass
+
+
+class AssistantThreadPool:
+    """
+    Keeps ASSISTANT_THREAD_POOL_SIZE assistant threads created ahead of time so
+    a websocket connect can take one instead of waiting on the API. Threads
+    left unused for ASSISTANT_THREAD_POOL_TTL seconds are discarded. Taking a
+    thread schedules a background refill, and an empty pool falls back to
+    creating a thread inline.
+    """
+
+    def __init__(self, store, size, ttl):
+        self.store = store
+        self.size = size
+        self.ttl = ttl
+        self.chat_engine = OpenAIChatEngine(assistant_id=settings.ASSISTANT_ID)
+        self._refill_task = None
+        # Strong references, the event loop only keeps weak ones to its tasks
+        self._background_tasks = set()
+
+    def is_expired(self, entry):
+        return time.time() - entry["created_at"] > self.ttl
+
+    async def take(self):
+        try:
+            while (entry := await self.store.pop()) is not None:
+                if not self.is_expired(entry):
+                    return entry["thread_id"]
+                self.discard(entry)
+        finally:
+            self.schedule_refill()
+
+        logger.info("Assistant thread pool is empty, creating a thread inline")
+        return await self.chat_engine.create_thread()
+
+    def discard(self, entry):
+        # Expired threads are deleted in the background, best effort
+        task = asyncio.create_task(self._delete_thread(entry["thread_id"]))
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
+    async def _delete_thread(self, thread_id):
+        try:
+            await self.chat_engine.delete_thread(thread_id)
+        except Exception as e:
+            logger.warning(f"Could not delete expired thread {thread_id}: {e}")
+
+    def schedule_refill(self):
+        if self._refill_task is None or self._refill_task.done():
+            self._refill_task = asyncio.create_task(self.refill())
+
+    async def refill(self):
+        try:
+            async with self.store.refill_lock() as acquired:
+                if not acquired:
+                    logger.info("Another process is refilling the thread pool")
+                    return
+                await self._refill()
+        except Exception as e:
+            logger.error(f"Assistant thread pool refill failed: {e}")
+
+    async def _refill(self):
+        # Expired entries sit at the head, the oldest end of the pool
+        while (entry := await self.store.peek()) and self.is_expired(entry):
+            popped = await self.store.pop()
+            if popped is None:
+                break
+            if self.is_expired(popped):
+                self.discard(popped)
+            else:
+                # Another process took the expired head first, the entry popped
+                # instead goes back to the head to keep the pool oldest first
+                await self.store.push_front(popped)
+                break
+
+        # Takes only shrink the pool while the refill lock is held, so the
+        # count cannot be overtaken by another refill before the push
+        missing = self.size - await self.store.count()
+        if missing <= 0:
+            return
+
+        results = await asyncio.gather(
+            *[self.chat_engine.create_thread() for _ in range(missing)],
+            return_exceptions=True,
+        )
+        created_at = time.time()
+        entries = [
+            {"thread_id": thread_id, "created_at": created_at}
+            for thread_id in results
+            if not isinstance(thread_id, Exception)
+        ]
+        if entries:
+            await self.store.push(entries)
+        logger.info(f"Added {len(entries)}/{missing} threads to the pool")
+
+
+def get_thread_pool():
+    """Returns the thread pool of the running event loop."""
+
+    def create_pool():
+        redis = get_redis_client()
+        store = RedisThreadStore(redis) if redis else LocalThreadStore()
+        return AssistantThreadPool(
+            store,
+            size=settings.ASSISTANT_THREAD_POOL_SIZE,
+            ttl=settings.ASSISTANT_THREAD_POOL_TTL,
+        )
+
+    return loop_local("assistant-thread-pool", create_pool)
@@ -10,6 +10,7 @@ from django.conf import settings
 from assistant.knowledge_vec import query_vec_database
 from assistant.memory import BaseMemory
 from assistant.models import Conversation
+from assistant.persistence import MessageWriteBuffer
 from assistant.tasks import save_conversation
 from assistant.utils import convert_markdown_to_html
 from koda.config.base_config import openai_client as client
@@ -42,6 +43,7 @@ class ChatConsumer(AsyncWebsocketConsumer):
 
         # Create the Conversation instance without setting the customer and channel
         self.conversation = await database_sync_to_async(Conversation.objects.create)()
+        self.message_buffer = MessageWriteBuffer(id=self.conversation.id)
 
         # Initialize the conversation start time
         self.conversation_memory.session_start_time = datetime.now()
@@ -55,6 +57,13 @@ class ChatConsumer(AsyncWebsocketConsumer):
 
     async def disconnect(self, close_code):
         logger.info("---------- CONNECTION DISCONNECTED ----------")
+
+        # Persist whatever the buffer still holds, connect may have failed
+        # before creating it
+        message_buffer = getattr(self, "message_buffer", None)
+        if message_buffer is not None:
+            await message_buffer.close()
+
         # Leave room group
         await self.channel_layer.group_discard(self.room_group_name, self.channel_name)
 
@@ -73,9 +82,10 @@ class ChatConsumer(AsyncWebsocketConsumer):
                 user_message = text_data_json.get("message")
                 message_id = str(uuid.uuid4())
 
-                self.conversation_memory.add_message(
+                message = self.conversation_memory.add_message(
                     role="user", content=user_message, message_id=message_id
                 )
+                self.message_buffer.add(message)
 
                 bot_response = "bot_message"  # replace this when ready
                 logger.info(bot_response)
@@ -85,12 +95,13 @@ class ChatConsumer(AsyncWebsocketConsumer):
 
                 # Add to the conversation tracker
                 judy_response_id = str(uuid.uuid4())
-                self.conversation_memory.add_message(
+                message = self.conversation_memory.add_message(
                     role="assistant",
                     content=bot_response,
                     duration=duration,
                     message_id=judy_response_id,
                 )
+                self.message_buffer.add(message)
 
                 logger.info(f"RESPONSE DURATION: {duration}")
 
@@ -0,0 +1,167 @@
+import hashlib
+import json
+import os
+import uuid
+from functools import lru_cache
+from pathlib import Path
+
+from botocore.exceptions import ClientError
+from django.conf import settings
+
+from koda.config.base_config import get_s3_client
+from koda.config.cache_backends import make_cache_key
+
+
+def get_chunk_id(s3_key, offset, text):
+    """Deterministic vector id, the same chunk always maps to the same id."""
+    content_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    return make_cache_key(s3_key, offset, content_hash)
+
+
+class S3ManifestStorage:
+    """Manifests kept in the knowledge bucket, so they outlive deploys."""
+
+    def __init__(self, bucket_name, prefix):
+        self.bucket_name = bucket_name
+        self.prefix = prefix.strip("/")
+
+    def read(self, name):
+        try:
+            response = get_s3_client().get_object(
+                Bucket=self.bucket_name, Key=f"{self.prefix}/{name}"
+            )
+        except ClientError as e:
+            if e.response["Error"]["Code"] in ("404", "NoSuchKey"):
+                return None
+            raise
+        return json.loads(response["Body"].read())
+
+    def write(self, name, data):
+        # A PUT replaces the object whole, readers never see a partial manifest
+        get_s3_client().put_object(
+            Bucket=self.bucket_name,
+            Key=f"{self.prefix}/{name}",
+            Body=json.dumps(data).encode("utf-8"),
+            ContentType="application/json",
+        )
+
+
+class LocalManifestStorage:
+    """Manifests on a local directory, e.g. next to a LocalVectorStore."""
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+
+    def read(self, name):
+        path = self.directory / name
+        if not path.exists():
+            return None
+        with open(path, encoding="utf-8") as manifest_file:
+            return json.load(manifest_file)
+
+    def write(self, name, data):
+        path = self.directory / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_suffix(".tmp")
+        with open(temp_path, "w", encoding="utf-8") as manifest_file:
+            json.dump(data, manifest_file)
+        os.replace(temp_path, path)
+
+
+@lru_cache(maxsize=None)
+def get_manifest_storage():
+    """Local when KNOWLEDGE_MANIFEST_DIR is set, the knowledge bucket otherwise."""
+    if settings.KNOWLEDGE_MANIFEST_DIR:
+        return LocalManifestStorage(settings.KNOWLEDGE_MANIFEST_DIR)
+    return S3ManifestStorage(
+        settings.AWS_STORAGE_BUCKET_NAME, settings.KNOWLEDGE_MANIFEST_PREFIX
+    )
+
+
+def get_index_generation(index_name=None):
+    """
+    Id of the current incarnation of an index. Every knowledge directory
+    indexed into it records the generation it was synced against.
+    """
+    index_name = index_name or settings.PINECONE_INDEX_NAME
+    data = get_manifest_storage().read(f"{index_name}.generation.json")
+    return data["generation"] if data else None
+
+
+def reset_index_generation(index_name=None):
+    """Starts a new generation, retiring the manifest of every directory."""
+    index_name = index_name or settings.PINECONE_INDEX_NAME
+    generation = uuid.uuid4().hex
+    get_manifest_storage().write(
+        f"{index_name}.generation.json", {"generation": generation}
+    )
+    return generation
+
+
+class KnowledgeManifest:
+    """
+    Record of what is indexed for one knowledge directory: the ETag of every
+    S3 object and the ids of the chunks it was split into. Written once a sync
+    completes. Several directories share one index, so a manifest is only
+    trusted while it was synced against the index's current generation.
+    """
+
+    def __init__(self, name, objects=None, revision=None, index_generation=None):
+        self.name = name
+        self.objects = objects or {}
+        self.revision = revision
+        self.index_generation = index_generation
+
+    @classmethod
+    def get_name(cls, knowledge_dir, index_name=None):
+        index_name = index_name or settings.PINECONE_INDEX_NAME
+        return f"{index_name}-{knowledge_dir}.json"
+
+    @classmethod
+    def load(cls, knowledge_dir, index_name=None):
+        name = cls.get_name(knowledge_dir, index_name)
+        generation = get_index_generation(index_name)
+        data = get_manifest_storage().read(name)
+        # A manifest from an earlier generation describes an index that is gone
+        if data is None or data.get("index_generation") != generation:
+            return cls(name, index_generation=generation)
+        return cls(
+            name,
+            objects=data["objects"],
+            revision=data.get("revision"),
+            index_generation=generation,
+        )
+
+    def get_etag(self, s3_key):
+        entry = self.objects.get(s3_key)
+        return entry["etag"] if entry else None
+
+    def get_chunk_ids(self, s3_key):
+        entry = self.objects.get(s3_key)
+        return entry["chunk_ids"] if entry else []
+
+    def set_object(self, s3_key, etag, chunk_ids):
+        self.objects[s3_key] = {"etag": etag, "chunk_ids": chunk_ids}
+
+    def all_chunk_ids(self):
+        return {
+            chunk_id
+            for entry in self.objects.values()
+            for chunk_id in entry["chunk_ids"]
+        }
+
+    def save(self):
+        # The revision changes whenever the indexed content does, which lets
+        # retrieval caches tell stale entries apart
+        self.revision = make_cache_key(
+            self.index_generation,
+            {s3_key: entry["etag"] for s3_key, entry in self.objects.items()},
+        )
+        get_manifest_storage().write(
+            self.name,
+            {
+                "revision": self.revision,
+                "index_generation": self.index_generation,
+                "objects": self.objects,
+            },
+        )
@@ -1,113 +1,327 @@
+import asyncio
+import random
 import time
 import uuid
+from functools import lru_cache
+
+import openai
 
-from pinecone import Pinecone
-import tiktoken
-from decouple import config
 from django.conf import settings
 from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_community.document_loaders import S3DirectoryLoader
+from langchain_community.document_loaders import S3FileLoader
 from more_itertools import chunked
 
-from koda.config.base_config import openai_client as client
+from assistant.knowledge_manifest import (
+    KnowledgeManifest,
+    get_chunk_id,
+    reset_index_generation,
+)
+from assistant.tokenizer import tiktoken_len
+from assistant.vector_store import get_vector_store
+from koda.config.base_config import (
+    get_openai_client,
+    get_openai_semaphore,
+    get_s3_client,
+)
+from koda.config.cache_backends import get_cache, make_cache_key
 from koda.config.logging_config import configure_logger
 
 logger = configure_logger(__name__)
 
 
-pinecone = Pinecone(
-    api_key=config("PINECONE_API_KEY"), environment=config("PINECONE_API_ENV")
-)
-
-
 CHUNK_SIZE = 1000
 CHUNK_OVERLAP = 10
 BATCH_SIZE = 50
-PINECONE_INDEX_NAME = settings.PINECONE_INDEX_NAME
+DELETE_BATCH_SIZE = 1000
+QUERY_PREAMBLE = (
+    "Across all Canadian provinces, regarding healthcare job regulations and "
+    "opportunities: "
+)
 
 
 # ------------------------ UTIL FUNCTIONS ----------------------
-async def get_text(knowledge_dir):
-    def tiktoken_len(text):
-        # Tokenize and split text
-        tokenizer = tiktoken.get_encoding("cl100k_base")
-        tokens = tokenizer.encode(text, disallowed_special=())
-        return len(tokens)
-
-    # Load data
-    loader = S3DirectoryLoader(
-        bucket=settings.AWS_STORAGE_BUCKET_NAME,
-        prefix=f"media/scraped_data/{knowledge_dir}/",
-        aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-        aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-    )
-    data = loader.load()
-    logger.info("Done getting texts from s3 knowledge datastore")
-
-    text_splitter = RecursiveCharacterTextSplitter(
+@lru_cache(maxsize=None)
+def get_text_splitter():
+    return RecursiveCharacterTextSplitter(
         chunk_size=CHUNK_SIZE,
         chunk_overlap=CHUNK_OVERLAP,
         length_function=tiktoken_len,
         separators=["\n\n", "\n", " ", ""],
+        # The chunk offset is part of its vector id
+        add_start_index=True,
     )
-    texts = text_splitter.split_documents(data)
+
+
+def iter_knowledge_objects(knowledge_dir):
+    """Lists the S3 objects of a knowledge directory page by page."""
+    paginator = get_s3_client().get_paginator("list_objects_v2")
+    pages = paginator.paginate(
+        Bucket=settings.AWS_STORAGE_BUCKET_NAME,
+        Prefix=f"media/scraped_data/{knowledge_dir}/",
+    )
+    for page in pages:
+        for s3_object in page.get("Contents", []):
+            # Skip folder placeholders
+            if not s3_object["Key"].endswith("/"):
+                yield s3_object
+
+
+def split_knowledge_object(s3_key):
+    """Loads one S3 object and splits it into token-sized chunks."""
+    loader = S3FileLoader(
+        bucket=settings.AWS_STORAGE_BUCKET_NAME,
+        key=s3_key,
+        aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
+        aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+    )
+    return get_text_splitter().split_documents(loader.load())
+
+
+def iter_text_chunks(knowledge_dir):
+    """
+    Yields the chunks of a knowledge directory one S3 object at a time, so
+    only a single document is held in memory instead of the whole directory.
+    """
+    for s3_object in iter_knowledge_objects(knowledge_dir):
+        yield from split_knowledge_object(s3_object["Key"])
+
+
+def iter_changed_chunks(knowledge_dir, manifest, synced_manifest):
+    """
+    Yields (chunk_id, chunk) for every chunk that is not indexed yet and records
+    each object's chunks in `synced_manifest`. Objects whose ETag matches the
+    manifest are not downloaded at all.
+    """
+    for s3_object in iter_knowledge_objects(knowledge_dir):
+        s3_key, etag = s3_object["Key"], s3_object["ETag"]
+        indexed_chunk_ids = manifest.get_chunk_ids(s3_key)
+
+        if manifest.get_etag(s3_key) == etag:
+            synced_manifest.set_object(s3_key, etag, indexed_chunk_ids)
+            continue
+
+        indexed_chunk_ids = set(indexed_chunk_ids)
+        chunk_ids = []
+        for chunk in split_knowledge_object(s3_key):
+            chunk_id = get_chunk_id(
+                s3_key, chunk.metadata["start_index"], chunk.page_content
+            )
+            chunk_ids.append(chunk_id)
+            if chunk_id not in indexed_chunk_ids:
+                yield chunk_id, chunk
+        synced_manifest.set_object(s3_key, etag, chunk_ids)
+
+
+async def get_text(knowledge_dir):
+    texts = list(iter_text_chunks(knowledge_dir))
     logger.info("Done splitting data into texts")
     return texts
 
 
+def iter_embedding_batches(chunks):
+    """
+    Groups (chunk_id, chunk) pairs into embedding requests of at most
+    EMBEDDING_BATCH_SIZE inputs and EMBEDDING_BATCH_TOKEN_BUDGET tokens.
+    """
+    batch, batch_tokens = [], 0
+    for chunk_id, chunk in chunks:
+        tokens = tiktoken_len(chunk.page_content)
+        if batch and (
+            len(batch) == settings.EMBEDDING_BATCH_SIZE
+            or batch_tokens + tokens > settings.EMBEDDING_BATCH_TOKEN_BUDGET
+        ):
+            yield batch
+            batch, batch_tokens = [], 0
+        batch.append((chunk_id, chunk))
+        batch_tokens += tokens
+    if batch:
+        yield batch
+
+
+RETRYABLE_EMBEDDING_ERRORS = (
+    openai.RateLimitError,
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.InternalServerError,
+)
+
+
+async def create_embeddings(texts):
+    """Embeds a batch of texts in one request, retrying transient failures."""
+    for attempt in range(settings.EMBEDDING_MAX_RETRIES + 1):
+        try:
+            async with get_openai_semaphore():
+                response = await get_openai_client().embeddings.create(
+                    input=texts, model=settings.EMBEDDING_MODEL
+                )
+            ordered = sorted(response.data, key=lambda data: data.index)
+            return [data.embedding for data in ordered]
+        except RETRYABLE_EMBEDDING_ERRORS as e:
+            if attempt == settings.EMBEDDING_MAX_RETRIES:
+                raise
+            delay = min(2**attempt, 30) + random.uniform(0, 1)
+            logger.warning(f"Embedding request failed ({e}), retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+
 async def create_embedding(text):
-    response = client.embeddings.create(input=[text], model="text-embedding-ada-002")
-    text_embedded = response.data[0].embedding
+    text_embedded = (await create_embeddings([text]))[0]
     return text_embedded
 
 
 async def save_vec_to_database(knowledge_dir, first_db_opt=False):
+    """
+    Syncs a knowledge directory into the index. Only chunks missing from the
+    manifest are embedded and upserted, and chunks that no longer exist in S3
+    are removed from the index.
+    """
     logger.info(f"Save-to-vec process started")
+    manifest = await asyncio.to_thread(KnowledgeManifest.load, knowledge_dir)
+
+    vector_store = get_vector_store()
+    recreated = await asyncio.to_thread(
+        vector_store.ensure_index, recreate=first_db_opt
+    )
+    if recreated:
+        # The index starts empty, so no directory's manifest describes it anymore.
+        # A new generation makes every directory re-index on its next sync.
+        generation = await asyncio.to_thread(reset_index_generation)
+        manifest = KnowledgeManifest(manifest.name, index_generation=generation)
+
+    synced_manifest = KnowledgeManifest(
+        manifest.name, index_generation=manifest.index_generation
+    )
+    batches = iter_embedding_batches(
+        iter_changed_chunks(knowledge_dir, manifest, synced_manifest)
+    )
+    upserted = 0
 
-    if first_db_opt and PINECONE_INDEX_NAME in pinecone.list_indexes():
-        logger.info(f"Deleting existing index: {PINECONE_INDEX_NAME}")
-        pinecone.delete_index(PINECONE_INDEX_NAME)
+    # Caps the batches being embedded or upserted, which also keeps the reader
+    # from pulling the whole knowledge directory ahead of the requests
+    slots = asyncio.Semaphore(settings.EMBEDDING_MAX_CONCURRENCY)
 
-    if PINECONE_INDEX_NAME not in pinecone.list_indexes():
-        logger.info(f"Creating new index: {PINECONE_INDEX_NAME}")
-        pinecone.create_index(PINECONE_INDEX_NAME, dimension=1536)
+    async def embed_and_upsert(batch_number, batch):
+        nonlocal upserted
+        try:
+            texts = [chunk.page_content for _, chunk in batch]
+            content_embedded = await create_embeddings(texts)
+            vectors = [
+                (
+                    chunk_id,
+                    embedding,
+                    {"text": chunk.page_content, "source": chunk.metadata["source"]},
+                )
+                for (chunk_id, chunk), embedding in zip(batch, content_embedded)
+            ]
+            # Split the vectors into smaller chunks (e.g., 50 vectors per request)
+            for upsert_batch in chunked(vectors, BATCH_SIZE):
+                await asyncio.to_thread(vector_store.upsert, upsert_batch)
+            upserted += len(vectors)
+            logger.info(f"Uploaded Batch {batch_number} ({len(vectors)} vectors)")
+        finally:
+            slots.release()
 
-    pinecone_index = pinecone.Index(index_name=PINECONE_INDEX_NAME)
-    text_chunks = await get_text(knowledge_dir)
-    embeddings = []
+    # A failed batch cancels the rest of the ingestion
+    async with asyncio.TaskGroup() as task_group:
+        batch_number = 0
+        while True:
+            await slots.acquire()
+            # S3 reads and splitting are blocking, keep them off the loop
+            batch = await asyncio.to_thread(next, batches, None)
+            if batch is None:
+                slots.release()
+                break
+            task_group.create_task(embed_and_upsert(batch_number, batch))
+            batch_number += 1
 
-    for i, chunk in enumerate(text_chunks):
-        id = uuid.uuid4().hex
-        content_embedded = await create_embedding(chunk.page_content)
-        embedding = (id, content_embedded, {"text": chunk.page_content})
-        embeddings.append(embedding)
-        logger.info(f"Appended embedding chunk {i}")
+    vanished = manifest.all_chunk_ids() - synced_manifest.all_chunk_ids()
+    for delete_batch in chunked(vanished, DELETE_BATCH_SIZE):
+        await asyncio.to_thread(vector_store.delete, delete_batch)
+    await asyncio.to_thread(vector_store.flush)
+
+    # Only a completed sync is recorded, a failed run is retried from the old one
+    await asyncio.to_thread(synced_manifest.save)
+    if recreated or upserted or vanished:
+        await publish_index_revision()
+    logger.info(
+        f"Synced {knowledge_dir}: {upserted} chunks upserted, "
+        f"{len(vanished)} chunks deleted"
+    )
+
+
+def get_query_cache(namespace):
+    return get_cache(
+        namespace,
+        backend=settings.QUERY_CACHE_BACKEND,
+        ttl=settings.QUERY_CACHE_TTL,
+        max_entries=settings.QUERY_CACHE_MAX_ENTRIES,
+    )
+
+
+async def publish_index_revision():
+    """
+    Starts a new revision of the shared index, retiring every cached match.
+    All knowledge directories share the index, so the revision is not derived
+    from any one directory's manifest.
+    """
+    revision = uuid.uuid4().hex
+    await get_query_cache("knowledge-index").set("revision", revision)
+    return revision
 
-    # Split the embeddings into smaller chunks (e.g., 50 vectors per request)
-    for i, batch in enumerate(chunked(embeddings, BATCH_SIZE)):
-        logger.info(f"Uploaded Batch {i}")
-        pinecone_index.upsert(batch)
+
+async def get_index_revision():
+    # An expired or never published revision is replaced by a fresh one, so
+    # matches cached before it can not be served again
+    revision = await get_query_cache("knowledge-index").get("revision")
+    return revision or await publish_index_revision()
+
+
+def normalize_query(query):
+    return " ".join(query.lower().split())
+
+
+async def get_query_embedding(query):
+    """Embeds a query, reusing the embedding of any query that normalizes alike."""
+    embedding_cache = get_query_cache("query-embeddings")
+    cache_key = make_cache_key(settings.EMBEDDING_MODEL, normalize_query(query))
+
+    query_embedding = await embedding_cache.get(cache_key)
+    if query_embedding is None:
+        query_embedding = await create_embedding(f"{QUERY_PREAMBLE}{query}")
+        await embedding_cache.set(cache_key, query_embedding)
+    return query_embedding
 
 
 async def query_vec_database(query, num_results):
     start_time = time.time()
-    query = f"Across all Canadian provinces, regarding healthcare job regulations and opportunities: {query}"
-    query_embedding = await create_embedding(query)
+    query_embedding = await get_query_embedding(query)
 
-    pinecone_index = pinecone.Index(index_name=PINECONE_INDEX_NAME)
+    # Every sync that changes the index publishes a new revision, which
+    # retires cached matches
+    revision = await get_index_revision()
+    matches_cache = get_query_cache("query-matches")
+    cache_key = make_cache_key(
+        revision,
+        settings.VECTOR_STORE_BACKEND,
+        make_cache_key(query_embedding),
+        num_results,
+    )
 
-    try:
-        results = pinecone_index.query(
-            query_embedding, top_k=num_results, include_metadata=True
-        )
-    except Exception as e:
-        logger.error(f"Error querying Pinecone index: {e}")
-        return []
+    matches = await matches_cache.get(cache_key)
+    if matches is None:
+        try:
+            matches = await asyncio.to_thread(
+                get_vector_store().query, query_embedding, num_results
+            )
+        except Exception as e:
+            logger.error(f"Error querying vector store: {e}")
+            return []
+        await matches_cache.set(cache_key, matches)
 
     duration = time.time() - start_time
     logger.info(f"QUERY VEC DURATION: {duration:.2f} seconds")
 
-    contexts = [results["matches"][0], results["matches"][1], results["matches"][2]]
+    contexts = matches[:3]
     return contexts
 
 
@@ -0,0 +1,82 @@
+import random
+import resource
+import time
+
+from django.core.management.base import BaseCommand
+
+from assistant.knowledge_vec import get_text_splitter
+
+WORDS = (
+    "nurse registration province licence college practice hospital patient care "
+    "employer permit application assessment credential exam bridging program "
+    "community clinic shift wage union benefits ontario alberta quebec manitoba"
+).split()
+
+
+def synthetic_document(rng, paragraphs, words_per_paragraph):
+    return "\n\n".join(
+        " ".join(rng.choices(WORDS, k=words_per_paragraph)) for _ in range(paragraphs)
+    )
+
+
+class Command(BaseCommand):
+    help = "Splits a synthetic knowledge corpus and reports throughput and peak RSS"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--documents", type=int, default=500)
+        parser.add_argument("--paragraphs", type=int, default=40)
+        parser.add_argument("--words-per-paragraph", type=int, default=120)
+        parser.add_argument(
+            "--mode",
+            choices=["stream", "materialize"],
+            default="stream",
+            help=(
+                "stream splits one document at a time, materialize loads the whole "
+                "corpus first like the old directory loader. Run each mode in its "
+                "own process, peak RSS never goes down."
+            ),
+        )
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        splitter = get_text_splitter()
+
+        def documents():
+            for _ in range(options["documents"]):
+                yield synthetic_document(
+                    rng, options["paragraphs"], options["words_per_paragraph"]
+                )
+
+        start_time = time.perf_counter()
+        total_bytes = 0
+        total_chunks = 0
+
+        if options["mode"] == "materialize":
+            corpus = list(documents())
+            chunks = []
+            for document in corpus:
+                total_bytes += len(document.encode("utf-8"))
+                chunks.extend(splitter.split_text(document))
+            total_chunks = len(chunks)
+        else:
+            for document in documents():
+                total_bytes += len(document.encode("utf-8"))
+                total_chunks += len(splitter.split_text(document))
+
+        duration = time.perf_counter() - start_time
+        # ru_maxrss is reported in kilobytes on Linux
+        peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+        self.stdout.write(
+            f"{options['mode']}: {options['documents']} documents, "
+            f"{total_bytes / 1024 / 1024:.1f} MiB, {total_chunks} chunks "
+            f"in {duration:.2f} s"
+        )
+        self.stdout.write(
+            f"Throughput: {options['documents'] / duration:.1f} docs/s, "
+            f"{total_chunks / duration:.1f} chunks/s, "
+            f"{total_bytes / 1024 / 1024 / duration:.2f} MiB/s"
+        )
+        self.stdout.write(f"Peak RSS: {peak_rss:.1f} MiB")
+        self.stdout.write(self.style.SUCCESS("Knowledge ingestion benchmark complete"))
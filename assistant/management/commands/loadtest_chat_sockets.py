@@ -0,0 +1,89 @@
+import asyncio
+import json
+import statistics
+import time
+
+from channels.testing import WebsocketCommunicator
+from django.core.management.base import BaseCommand
+
+from assistant.assistant_api_setup.asst_consumers import ChatConsumer
+
+
+async def run_socket(application, message, timeout):
+    """Connects one chat socket, runs one turn and returns its timings."""
+    communicator = WebsocketCommunicator(application, "/ws/chat/")
+
+    start_time = time.perf_counter()
+    connected, _ = await communicator.connect(timeout=timeout)
+    if not connected:
+        raise RuntimeError("Socket was not accepted")
+    connect_time = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    await communicator.send_to(
+        text_data=json.dumps({"type": "user_message", "message": message})
+    )
+    await communicator.receive_from(timeout=timeout)
+    turn_time = time.perf_counter() - start_time
+
+    await communicator.disconnect()
+    return connect_time, turn_time
+
+
+class Command(BaseCommand):
+    help = (
+        "Opens many assistant chat sockets at once and reports whether their "
+        "turns progress in parallel. Calls the live assistant API."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sockets", type=int, default=20)
+        parser.add_argument(
+            "--message", default="What do I need to work as a nurse in Ontario?"
+        )
+        parser.add_argument("--timeout", type=float, default=90)
+
+    def handle(self, *args, **options):
+        asyncio.run(self.run_load_test(options))
+
+    async def run_load_test(self, options):
+        application = ChatConsumer.as_asgi()
+
+        start_time = time.perf_counter()
+        results = await asyncio.gather(
+            *[
+                run_socket(application, options["message"], options["timeout"])
+                for _ in range(options["sockets"])
+            ],
+            return_exceptions=True,
+        )
+        wall_time = time.perf_counter() - start_time
+
+        failures = [result for result in results if isinstance(result, Exception)]
+        timings = [result for result in results if not isinstance(result, Exception)]
+        for failure in failures:
+            self.stdout.write(self.style.WARNING(f"Socket failed: {failure!r}"))
+        if not timings:
+            self.stdout.write(self.style.ERROR("Every socket failed"))
+            return
+
+        connect_times = sorted(connect for connect, _ in timings)
+        turn_times = sorted(turn for _, turn in timings)
+        sequential_time = sum(connect + turn for connect, turn in timings)
+
+        self.stdout.write(
+            f"{len(timings)}/{options['sockets']} sockets completed "
+            f"in {wall_time:.2f} s"
+        )
+        self.stdout.write(
+            f"Connect: median {statistics.median(connect_times):.3f} s, "
+            f"max {connect_times[-1]:.3f} s"
+        )
+        self.stdout.write(
+            f"Turn: median {statistics.median(turn_times):.2f} s, "
+            f"max {turn_times[-1]:.2f} s"
+        )
+        # Close to 1 means the sockets ran one after another, close to the
+        # socket count means they progressed in parallel
+        self.stdout.write(f"Parallelism: {sequential_time / wall_time:.1f}x")
+        self.stdout.write(self.style.SUCCESS("Chat socket load test complete"))
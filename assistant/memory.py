@@ -1,31 +1,128 @@
+import uuid
+from collections import deque
 from datetime import datetime
 
+from django.conf import settings
+
+from assistant.tokenizer import tiktoken_len
+
+
+class MessageRecord:
+    """One conversation message, slotted to keep long sessions small."""
+
+    __slots__ = ("role", "content", "message_id", "duration", "timestamp", "tokens")
+
+    def __init__(self, role, content, message_id, duration, timestamp):
+        self.role = role
+        self.content = content
+        self.message_id = message_id
+        self.duration = duration
+        self.timestamp = timestamp  # POSIX seconds, formatted only on export
+        self.tokens = None  # counted the first time the model window needs it
+
+    def get_tokens(self):
+        if self.tokens is None:
+            self.tokens = tiktoken_len(self.content or "")
+        return self.tokens
+
+    def to_dict(self):
+        return {
+            "role": self.role,
+            "content": self.content,
+            "message_id": self.message_id,
+            "duration": self.duration,
+            "timestamp": datetime.fromtimestamp(self.timestamp).isoformat(),
+        }
+
 
 class BaseMemory:
-    def __init__(self):
-        self.full_conversation_history = []  # Store full details including timestamps
-        self.openai_conversation_history = []  # Store only role and content
+    """
+    Conversation state for one socket. Messages are kept once, as MessageRecords
+    whose content comes from a store shared by the whole conversation, and both
+    the full and the model-facing history are views over them.
+
+    Only the last CONVERSATION_MAX_MESSAGES records are kept. Older ones are
+    evicted, they have already been written by the consumer's message buffer,
+    and the response time totals are kept as running sums so analytics still
+    cover the whole session. The model-facing history is the most recent run of
+    messages that fits in CONVERSATION_HISTORY_TOKEN_BUDGET tokens, messages are
+    only tokenized once that window is asked for.
+    """
+
+    def __init__(self, max_messages=None, token_budget=None):
+        self.max_messages = max_messages or settings.CONVERSATION_MAX_MESSAGES
+        self.token_budget = token_budget or settings.CONVERSATION_HISTORY_TOKEN_BUDGET
+        self.messages = deque()
+        self.evicted_messages = 0
+        # Identical content (canned replies, repeated questions) is stored once,
+        # each entry maps the content to its canonical string and reference count
+        self._contents = {}
+        self.response_time_total = 0.0
+        self.response_count = 0
         self.unanswered_questions = 0  # Count number of unanswered questions
         self.votes = {}
         self.session_start_time = None  # Time when the session starts
         self.session_end_time = None  # Time when the session ends
 
+    @classmethod
+    def from_dict(cls, data):
+        """Rebuilds a memory from `to_dict` output, e.g. inside a Celery task."""
+        memory = cls()
+        for message in data["full_conversation_history"]:
+            memory._append(
+                message["role"],
+                message["content"],
+                message["message_id"],
+                message.get("duration"),
+                datetime.fromisoformat(message["timestamp"]).timestamp(),
+            )
+        # Totals exported by the consumer also cover the evicted messages
+        memory.response_time_total = data.get(
+            "response_time_total", memory.response_time_total
+        )
+        memory.response_count = data.get("response_count", memory.response_count)
+        memory.evicted_messages = data.get("evicted_messages", 0)
+        memory.unanswered_questions = data.get("unanswered_questions", 0)
+        memory.votes = data.get("votes", {})
+        memory.session_start_time = data.get("session_start_time")
+        memory.session_end_time = data.get("session_end_time")
+        return memory
+
     def add_message(self, role, content, **kwargs):
-        # Add to full conversation history
-        message_id = kwargs.get("message_id", None)
+        # Every message gets an id so incremental and final saves match up
+        message_id = kwargs.get("message_id") or str(uuid.uuid4())
         duration = kwargs.get("duration", None)
-        self.full_conversation_history.append(
-            {
-                "role": role,
-                "content": content,
-                "message_id": message_id,
-                "duration": duration,
-                "timestamp": datetime.now().isoformat(),
-            }
+        record = self._append(
+            role, content, message_id, duration, datetime.now().timestamp()
         )
+        return record.to_dict()
 
-        # Add to OpenAI-specific conversation history
-        self.openai_conversation_history.append({"role": role, "content": content})
+    def _append(self, role, content, message_id, duration, timestamp):
+        content = self._retain(content)
+        record = MessageRecord(role, content, message_id, duration, timestamp)
+        self.messages.append(record)
+
+        if role == "assistant" and duration is not None:
+            self.response_time_total += duration
+            self.response_count += 1
+
+        while len(self.messages) > self.max_messages:
+            self._release(self.messages.popleft().content)
+            self.evicted_messages += 1
+        return record
+
+    def _retain(self, content):
+        entry = self._contents.get(content)
+        if entry is None:
+            entry = self._contents[content] = [content, 0]
+        entry[1] += 1
+        return entry[0]
+
+    def _release(self, content):
+        entry = self._contents[content]
+        entry[1] -= 1
+        if not entry[1]:
+            del self._contents[content]
 
     def upvote(self, message_id):
         self.votes[message_id] = self.votes.get(message_id, 0) + 1
@@ -37,18 +134,35 @@ class BaseMemory:
         self.unanswered_questions += 1
 
     def get_history(self):
-        return self.full_conversation_history
+        return [record.to_dict() for record in self.messages]
 
     def get_openai_history(self):
-        return self.openai_conversation_history
+        # Walk back from the newest message until the budget is spent, the
+        # latest message is always included even if it alone is over budget
+        window = []
+        tokens = 0
+        for record in reversed(self.messages):
+            tokens += record.get_tokens()
+            if window and tokens > self.token_budget:
+                break
+            window.append({"role": record.role, "content": record.content})
+        window.reverse()
+        return window
 
     def get_votes(self):
         return self.votes
 
+    def get_average_response_time(self):
+        if not self.response_count:
+            return 0
+        return self.response_time_total / self.response_count
+
     def to_dict(self):
         return {
-            "full_conversation_history": self.full_conversation_history,
-            "openai_conversation_history": self.openai_conversation_history,
+            "full_conversation_history": self.get_history(),
+            "evicted_messages": self.evicted_messages,
+            "response_time_total": self.response_time_total,
+            "response_count": self.response_count,
             "unanswered_questions": self.unanswered_questions,
             "votes": self.votes,
             "session_start_time": self.session_start_time,
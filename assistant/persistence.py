@@ -0,0 +1,86 @@
+import asyncio
+
+from channels.db import database_sync_to_async
+from django.conf import settings
+
+from assistant.models import Conversation, Message
+from koda.config.logging_config import configure_logger
+
+logger = configure_logger(__name__)
+
+
+def build_message(conversation, message):
+    """Maps a conversation memory record onto a Message row."""
+    return Message(
+        message_id=message["message_id"],
+        conversation=conversation,
+        content=message["content"],
+        sender="BOT" if message["role"] == "assistant" else message["role"].upper(),
+        timestamp=message["timestamp"],
+    )
+
+
+class MessageWriteBuffer:
+    """
+    Write-behind buffer for the messages of one conversation. Messages are
+    written with one bulk_create every MESSAGE_BUFFER_FLUSH_SIZE messages or
+    MESSAGE_BUFFER_FLUSH_INTERVAL seconds, whichever comes first, so a socket
+    that dies before ending its session loses at most one interval of messages.
+
+    Args:
+        **conversation_lookup: Fields identifying the conversation, it is
+            created on the first flush if it does not exist yet.
+    """
+
+    def __init__(self, **conversation_lookup):
+        self.conversation_lookup = conversation_lookup
+        self.conversation = None
+        self.pending = []
+        self._flush_lock = asyncio.Lock()
+        self._flush_task = None
+        self._timer = None
+
+    def add(self, message):
+        self.pending.append(message)
+        if len(self.pending) >= settings.MESSAGE_BUFFER_FLUSH_SIZE:
+            self._schedule_flush()
+        elif self._timer is None:
+            self._timer = asyncio.create_task(self._flush_later())
+
+    def _schedule_flush(self):
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self.flush())
+
+    async def _flush_later(self):
+        await asyncio.sleep(settings.MESSAGE_BUFFER_FLUSH_INTERVAL)
+        self._timer = None
+        await self.flush()
+
+    async def flush(self):
+        async with self._flush_lock:
+            batch, self.pending = self.pending, []
+            if not batch:
+                return
+            try:
+                await database_sync_to_async(self._write)(batch)
+            except Exception as e:
+                # Keep the batch for the next flush
+                self.pending = batch + self.pending
+                logger.error(f"Could not persist {len(batch)} messages: {e}")
+
+    def _write(self, batch):
+        if self.conversation is None:
+            self.conversation, _ = Conversation.objects.get_or_create(
+                **self.conversation_lookup
+            )
+        # message_id is unique, so a retried batch never duplicates rows
+        Message.objects.bulk_create(
+            [build_message(self.conversation, message) for message in batch],
+            ignore_conflicts=True,
+        )
+
+    async def close(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        await self.flush()
@@ -5,6 +5,7 @@ from celery import shared_task
 
 from accounts.models import OrganizationProfile, User
 from assistant.memory import BaseMemory
+from assistant.persistence import build_message
 from assistant.models import (
     Channel,
     Conversation,
@@ -24,11 +25,7 @@ def save_conversation(
     conversation_memory_dict, conversation_id, user_details, channel_name
 ):
     logger.info(f"---------------- SAVING CONVERSATION STARTED ---------------")
-    conversation_memory = BaseMemory()
-    conversation_memory.full_conversation_history = conversation_memory_dict[
-        "full_conversation_history"
-    ]
-    conversation_memory.votes = conversation_memory_dict["votes"]
+    conversation_memory = BaseMemory.from_dict(conversation_memory_dict)
     session_start_time = conversation_memory_dict.get("session_start_time")
     session_end_time = conversation_memory_dict.get("session_end_time")
 
@@ -71,8 +68,8 @@ def save_conversation(
             conversation=conversation
         )
         if created:
-            analytics.avg_response_time = calculate_average_response_time(
-                conversation_memory.get_history()
+            analytics.avg_response_time = (
+                conversation_memory.get_average_response_time()
             )
             analytics.thumbs_up = sum(
                 [vote for vote in conversation_memory.votes.values() if vote > 0]
@@ -96,49 +93,33 @@ def save_conversation(
         logger.error("Conversation does not exist")
         return
 
-    for message in conversation_memory.get_history():
-        message_id = message.get("message_id", None)
-        Message.objects.create(
-            message_id=message_id,  # This will be None if 'message_id' is not in message, and a new UUID will be auto-generated.
-            conversation=conversation,
-            content=message["content"],
-            sender=(
-                "BOT" if message["role"] == "assistant" else message["role"].upper()
-            ),
-            timestamp=message["timestamp"],
-        )
+    # Most messages were already written by the consumer's MessageWriteBuffer,
+    # conflicts on the unique message_id skip those
+    Message.objects.bulk_create(
+        [
+            build_message(conversation, message)
+            for message in conversation_memory.get_history()
+        ],
+        ignore_conflicts=True,
+    )
     logger.info(f"MESSAGES SAVED")
 
     # Save votes to MessageVote
-    for message_id, vote_value in conversation_memory.votes.items():
-        try:
-            message = Message.objects.get(pk=message_id)
-        except Message.DoesNotExist:
-            logger.error(f"Message {message_id} does not exist")
-            continue
-
-        vote_type = "UP" if vote_value > 0 else "DOWN"
-        MessageVote.objects.create(message=message, vote_type=vote_type)
+    votes = conversation_memory.votes
+    messages = Message.objects.in_bulk(list(votes), field_name="message_id")
+    for message_id in votes.keys() - messages.keys():
+        logger.error(f"Message {message_id} does not exist")
+
+    MessageVote.objects.bulk_create(
+        [
+            MessageVote(
+                message=messages[message_id],
+                vote_type="UP" if vote_value > 0 else "DOWN",
+            )
+            for message_id, vote_value in votes.items()
+            if message_id in messages
+        ]
+    )
     logger.info(f"MESSAGE VOTE SAVED")
     logger.info(f"---------------- SAVING CONVERSATION ENDED ---------------")
 
-
-def calculate_average_response_time(conversation_history):
-    # Initialize sum and count variables
-    total_response_time = 0
-    total_messages = 0
-
-    # Loop through each message in the conversation
-    for message in conversation_history:
-        # Check if the role is 'assistant'
-        if message["role"] == "assistant":
-            # Check if 'duration' exists and is not None
-            if "duration" in message and message["duration"] is not None:
-                total_response_time += message["duration"]
-                total_messages += 1
-
-    # Calculate average
-    if total_messages == 0:
-        return 0  # To avoid division by zero
-    else:
-        return total_response_time / total_messages
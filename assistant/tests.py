@@ -1,3 +1,358 @@
-from django.test import TestCase
+import asyncio
+import json
+import tempfile
+import uuid
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+
+from assistant.assistant_api_setup.asst_consumers import (
+    ChatConsumer as AssistantChatConsumer,
+)
+from assistant.assistant_api_setup.polling import TurnTimings, poll_run
+from assistant.consumers import ChatConsumer
+from assistant.memory import BaseMemory
+from assistant.models import Conversation, Message
+from assistant.persistence import MessageWriteBuffer
+from assistant.vector_store import EMBEDDING_DIMENSION, LocalVectorStore
+
+
+def unit_vector(dimension, scale=1.0):
+    vector = np.zeros(EMBEDDING_DIMENSION, dtype=np.float32)
+    vector[dimension] = scale
+    return vector
+
+
+class LocalVectorStoreTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def create_store(self, **kwargs):
+        return LocalVectorStore("kb", self.directory.name, **kwargs)
+
+    def index(self, store, count):
+        store.ensure_index()
+        store.upsert(
+            [(f"id{i}", unit_vector(i, scale=3.0), {"n": i}) for i in range(count)]
+        )
+        store.flush()
+
+    def test_query_returns_best_matches_in_order(self):
+        store = self.create_store()
+        self.index(store, 5)
+
+        query = unit_vector(2) + unit_vector(4) * 0.5
+        matches = store.query(query, 2)
+
+        self.assertEqual([match["id"] for match in matches], ["id2", "id4"])
+        self.assertEqual(matches[0]["metadata"], {"n": 2})
+        self.assertAlmostEqual(matches[0]["score"], 1 / np.sqrt(1.25), places=5)
+
+    def test_upsert_replaces_and_delete_removes(self):
+        store = self.create_store()
+        self.index(store, 3)
+
+        store.upsert([("id1", unit_vector(7), {"n": 10})])
+        store.delete(["id2"])
+        store.flush()
+
+        self.assertEqual(store.query(unit_vector(7), 1)[0]["metadata"], {"n": 10})
+        ids = {match["id"] for match in store.query(unit_vector(0), 10)}
+        self.assertEqual(ids, {"id0", "id1"})
+
+    def test_ensure_index_reports_empty_and_recreate(self):
+        store = self.create_store()
+        self.assertTrue(store.ensure_index())
+        self.index(store, 2)
+
+        self.assertFalse(store.ensure_index())
+        self.assertTrue(store.ensure_index(recreate=True))
+        store.flush()
+        self.assertEqual(store.query(unit_vector(0), 5), [])
+
+    def test_ivf_finds_the_same_best_match(self):
+        store = self.create_store(ivf_lists=4, ivf_probes=4)
+        self.index(store, 20)
+
+        self.assertIsNotNone(store.snapshot[3])
+        for dimension in (0, 7, 19):
+            match = store.query(unit_vector(dimension), 1)[0]
+            self.assertEqual(match["id"], f"id{dimension}")
+
+    def test_reader_sees_flushes_from_another_store(self):
+        writer = self.create_store(ivf_lists=2)
+        reader = self.create_store(ivf_lists=2)
+        self.index(writer, 5)
+        self.assertEqual(reader.query(unit_vector(3), 1)[0]["metadata"], {"n": 3})
+
+        writer.upsert([("id3", unit_vector(9), {"n": 33})])
+        writer.flush()
+
+        match = reader.query(unit_vector(9), 1)[0]
+        self.assertEqual(match, {"id": "id3", "score": 1.0, "metadata": {"n": 33}})
+
+    def test_flush_keeps_only_the_current_files(self):
+        store = self.create_store(ivf_lists=2)
+        self.index(store, 5)
+        self.index(store, 6)
+
+        with open(store.records_path, encoding="utf-8") as records_file:
+            records = json.load(records_file)
+        files = {path.name for path in store.directory.iterdir()}
+        self.assertEqual(files, {"kb.records.json", records["matrix"], records["ivf"]})
+
+    def test_records_naming_removed_files_keep_old_snapshot(self):
+        writer = self.create_store()
+        reader = self.create_store()
+        self.index(writer, 3)
+        self.assertEqual(len(reader.query(unit_vector(0), 10)), 3)
+
+        # As if a newer flush removed the matrix right after the records were read
+        with open(writer.records_path, encoding="utf-8") as records_file:
+            records = json.load(records_file)
+        records.update(matrix="kb.gone.npy", ids=["other"], metadata=[{}])
+        with open(writer.records_path, "w", encoding="utf-8") as records_file:
+            json.dump(records, records_file)
+
+        matches = reader.query(unit_vector(0), 10)
+        self.assertEqual({match["id"] for match in matches}, {"id0", "id1", "id2"})
+
+        # The next complete flush is picked up
+        writer.upsert([("id5", unit_vector(5), {"n": 5})])
+        writer.flush()
+        self.assertEqual(reader.query(unit_vector(5), 1)[0]["id"], "id5")
+
+
+@override_settings(ASSISTANT_POLL_INITIAL_DELAY=0.001, ASSISTANT_POLL_MAX_DELAY=0.002)
+class PollRunTests(SimpleTestCase):
+    def make_retrieve(self, statuses):
+        statuses = iter(statuses)
+
+        async def retrieve_run():
+            return SimpleNamespace(id="run", status=next(statuses))
+
+        return retrieve_run
+
+    async def test_returns_the_final_run(self):
+        timings = TurnTimings()
+        run = await poll_run(
+            self.make_retrieve(["queued", "in_progress", "completed"]),
+            SimpleNamespace(id="run", status="queued"),
+            timings=timings,
+            timeout=5,
+        )
+
+        self.assertEqual(run.status, "completed")
+        self.assertEqual(timings.polls, 3)
+        self.assertGreater(timings.run, 0)
+
+    async def test_timeout_cancels_the_run(self):
+        cancelled = []
+
+        async def cancel_run():
+            cancelled.append(True)
+
+        with self.assertRaises(TimeoutError):
+            await poll_run(
+                self.make_retrieve(["in_progress"] * 1000),
+                SimpleNamespace(id="run", status="queued"),
+                timeout=0.01,
+                cancel_run=cancel_run,
+            )
+        self.assertEqual(cancelled, [True])
+
+    async def test_failed_cancel_still_raises_timeout(self):
+        async def cancel_run():
+            raise RuntimeError("cancel failed")
+
+        with self.assertRaises(TimeoutError):
+            await poll_run(
+                self.make_retrieve(["in_progress"] * 1000),
+                SimpleNamespace(id="run", status="queued"),
+                timeout=0.01,
+                cancel_run=cancel_run,
+            )
+
+
+@override_settings(MESSAGE_BUFFER_FLUSH_SIZE=3, MESSAGE_BUFFER_FLUSH_INTERVAL=60)
+class MessageWriteBufferTests(TransactionTestCase):
+    def setUp(self):
+        self.memory = BaseMemory(max_messages=50, token_budget=100)
+        self.thread = f"thread_{uuid.uuid4().hex[:8]}"
+
+    def add(self, buffer, count):
+        for i in range(count):
+            buffer.add(self.memory.add_message("user", f"message {i}"))
+
+    async def count_messages(self):
+        return await Message.objects.filter(conversation__thread=self.thread).acount()
+
+    async def test_flushes_once_the_batch_is_full(self):
+        buffer = MessageWriteBuffer(thread=self.thread)
+        self.add(buffer, 2)
+        await asyncio.sleep(0)
+        self.assertEqual(await self.count_messages(), 0)
+
+        self.add(buffer, 1)
+        await buffer._flush_task
+        self.assertEqual(await self.count_messages(), 3)
+        self.assertEqual(buffer.pending, [])
+        await buffer.close()
+
+    @override_settings(MESSAGE_BUFFER_FLUSH_INTERVAL=0.01)
+    async def test_flushes_after_the_interval(self):
+        buffer = MessageWriteBuffer(thread=self.thread)
+        self.add(buffer, 1)
+        await asyncio.sleep(0.2)
+        self.assertEqual(await self.count_messages(), 1)
+        await buffer.close()
+
+    async def test_close_writes_pending_messages_and_stops_the_timer(self):
+        buffer = MessageWriteBuffer(thread=self.thread)
+        self.add(buffer, 2)
+        timer = buffer._timer
+
+        await buffer.close()
+
+        self.assertEqual(await self.count_messages(), 2)
+        self.assertTrue(timer.cancelled() or timer.done())
+        self.assertIsNone(buffer._timer)
+
+    async def test_failed_write_is_retried_without_duplicates(self):
+        buffer = MessageWriteBuffer(thread=self.thread)
+        self.add(buffer, 2)
+
+        with mock.patch.object(buffer, "_write", side_effect=RuntimeError("db down")):
+            await buffer.flush()
+        self.assertEqual(len(buffer.pending), 2)
+
+        await buffer.flush()
+        self.assertEqual(await self.count_messages(), 2)
+
+        # A batch that was written but reported as failed is written again
+        buffer.pending = self.memory.get_history()
+        await buffer.flush()
+        self.assertEqual(await self.count_messages(), 2)
+        await buffer.close()
+
+    async def test_messages_map_onto_one_conversation(self):
+        buffer = MessageWriteBuffer(thread=self.thread)
+        buffer.add(self.memory.add_message("assistant", "hello", duration=1.0))
+        await buffer.close()
+
+        conversation = await Conversation.objects.aget(thread=self.thread)
+        message = await Message.objects.aget(conversation=conversation)
+        self.assertEqual(message.sender, "BOT")
+        self.assertEqual(message.content, "hello")
+
+
+class ConsumerDisconnectTests(SimpleTestCase):
+    async def test_disconnect_before_the_buffer_exists(self):
+        # connect failed before creating the message buffer
+        for consumer_class in (ChatConsumer, AssistantChatConsumer):
+            with mock.patch(
+                "assistant.assistant_api_setup.asst_consumers.OpenAIChatEngine"
+            ):
+                consumer = consumer_class()
+            consumer.room_group_name = "chat_room"
+            consumer.channel_name = "channel"
+            consumer.channel_layer = mock.AsyncMock()
+
+            await consumer.disconnect(1006)
+
+            consumer.channel_layer.group_discard.assert_awaited_once_with(
+                "chat_room", "channel"
+            )
+
+
+def count_words(text):
+    # Readable token counts that need no tokenizer download
+    return len(text.split())
+
+
+@mock.patch("assistant.memory.tiktoken_len", count_words)
+class BaseMemoryTests(SimpleTestCase):
+    def test_openai_history_is_the_newest_run_within_budget(self):
+        memory = BaseMemory(max_messages=50, token_budget=4)
+        memory.add_message("user", "one two three")
+        memory.add_message("assistant", "four five")
+        memory.add_message("user", "six seven")
+        memory.add_message("assistant", "eight")
+
+        self.assertEqual(
+            memory.get_openai_history(),
+            [
+                {"role": "user", "content": "six seven"},
+                {"role": "assistant", "content": "eight"},
+            ],
+        )
+
+    def test_openai_history_keeps_an_oversized_latest_message(self):
+        memory = BaseMemory(max_messages=50, token_budget=2)
+        memory.add_message("user", "hi")
+        memory.add_message("user", "a message well over the budget")
+
+        history = memory.get_openai_history()
+        self.assertEqual(
+            [message["content"] for message in history],
+            ["a message well over the budget"],
+        )
+
+    def test_tokens_are_only_counted_for_the_window(self):
+        memory = BaseMemory(max_messages=50, token_budget=1)
+        for content in ("a", "b", "c"):
+            memory.add_message("user", content)
+        self.assertTrue(all(record.tokens is None for record in memory.messages))
+
+        memory.get_openai_history()
+        counted = [record.tokens for record in memory.messages]
+        self.assertEqual(counted, [None, 1, 1])
+
+    def test_eviction_keeps_running_totals_and_shared_content(self):
+        memory = BaseMemory(max_messages=3, token_budget=100)
+        memory.add_message("assistant", "same", duration=1.0)
+        memory.add_message("assistant", "same", duration=3.0)
+        memory.add_message("user", "other")
+        memory.add_message("assistant", "last", duration=5.0)
+
+        self.assertEqual(len(memory.messages), 3)
+        self.assertEqual(memory.evicted_messages, 1)
+        self.assertEqual(memory.get_average_response_time(), 3.0)
+        self.assertEqual(memory._contents["same"][1], 1)
+
+        memory.add_message("user", "more")
+        self.assertNotIn("same", memory._contents)
+        self.assertIs(memory.messages[0].content, memory._contents["other"][0])
+
+    def test_votes_are_summed_per_message(self):
+        memory = BaseMemory(max_messages=10, token_budget=100)
+        first = memory.add_message("assistant", "a")["message_id"]
+        second = memory.add_message("assistant", "b")["message_id"]
+
+        memory.upvote(first)
+        memory.upvote(first)
+        memory.downvote(second)
+
+        self.assertEqual(memory.get_votes(), {first: 2, second: -1})
+
+    def test_from_dict_round_trips(self):
+        memory = BaseMemory(max_messages=2, token_budget=100)
+        memory.add_message("user", "question")
+        message_id = memory.add_message("assistant", "answer", duration=2.0)[
+            "message_id"
+        ]
+        memory.add_message("assistant", "again", duration=4.0)
+        memory.upvote(message_id)
+        memory.increment_unanswered_questions()
+
+        with override_settings(CONVERSATION_MAX_MESSAGES=2):
+            restored = BaseMemory.from_dict(memory.to_dict())
+
+        self.assertEqual(restored.get_history(), memory.get_history())
+        self.assertEqual(restored.get_average_response_time(), 3.0)
+        self.assertEqual(restored.evicted_messages, 1)
+        self.assertEqual(restored.votes, {message_id: 1})
+        self.assertEqual(restored.unanswered_questions, 1)
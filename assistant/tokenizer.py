@@ -0,0 +1,14 @@
+from functools import lru_cache
+
+import tiktoken
+
+
+@lru_cache(maxsize=None)
+def get_encoder(encoding_name="cl100k_base"):
+    return tiktoken.get_encoding(encoding_name)
+
+
+def tiktoken_len(text):
+    # Callers measure text many times over, so the encoder is shared
+    tokens = get_encoder().encode(text, disallowed_special=())
+    return len(tokens)
@@ -0,0 +1,315 @@
+import json
+import os
+import threading
+import uuid
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+from decouple import config
+from django.conf import settings
+
+from koda.config.logging_config import configure_logger
+
+logger = configure_logger(__name__)
+
+EMBEDDING_DIMENSION = 1536
+
+
+class BaseVectorStore:
+    """
+    Interface the knowledge base indexes into and queries from. Vectors are
+    (id, values, metadata) tuples and matches are dicts with id, score and
+    metadata, the same shape Pinecone returns.
+    """
+
+    def ensure_index(self, recreate=False):
+        """Creates the index if needed and returns True if it started empty."""
+        raise NotImplementedError
+
+    def upsert(self, vectors):
+        raise NotImplementedError
+
+    def delete(self, ids):
+        raise NotImplementedError
+
+    def query(self, vector, top_k):
+        raise NotImplementedError
+
+    def flush(self):
+        """Persists pending writes, a no-op for remote stores."""
+
+
+class PineconeVectorStore(BaseVectorStore):
+    def __init__(self, index_name):
+        from pinecone import Pinecone
+
+        self.index_name = index_name
+        self.pinecone = Pinecone(
+            api_key=config("PINECONE_API_KEY"), environment=config("PINECONE_API_ENV")
+        )
+        self._index = None
+
+    @property
+    def index(self):
+        if self._index is None:
+            self._index = self.pinecone.Index(index_name=self.index_name)
+        return self._index
+
+    def ensure_index(self, recreate=False):
+        if recreate and self.index_name in self.pinecone.list_indexes():
+            logger.info(f"Deleting existing index: {self.index_name}")
+            self.pinecone.delete_index(self.index_name)
+            self._index = None
+
+        if self.index_name in self.pinecone.list_indexes():
+            return False
+
+        logger.info(f"Creating new index: {self.index_name}")
+        self.pinecone.create_index(self.index_name, dimension=EMBEDDING_DIMENSION)
+        return True
+
+    def upsert(self, vectors):
+        self.index.upsert(vectors)
+
+    def delete(self, ids):
+        self.index.delete(ids=list(ids))
+
+    def query(self, vector, top_k):
+        results = self.index.query(vector, top_k=top_k, include_metadata=True)
+        return [
+            {"id": match["id"], "score": match["score"], "metadata": match["metadata"]}
+            for match in results["matches"]
+        ]
+
+
+class LocalVectorStore(BaseVectorStore):
+    """
+    In-process index persisted under LOCAL_VECTOR_STORE_DIR. Vectors live in
+    a float32 .npy matrix that is memory-mapped for queries, ids and metadata in
+    a JSON records file. Rows are L2-normalized so a dot product is the cosine
+    score Pinecone reports.
+
+    Queries are brute force unless LOCAL_VECTOR_IVF_LISTS is set, in which case
+    an inverted file index is built on flush: rows are clustered around k-means
+    centroids and only the LOCAL_VECTOR_IVF_PROBES closest clusters are scanned.
+
+    Every flush writes its matrix and IVF under new file names and then replaces
+    the records file, which names them. The records file is the only one that
+    is ever replaced, so a reader always pairs ids with the matrix they were
+    written with. Ingestion usually runs in another process, so every query
+    first checks whether the records file was replaced and reloads if it was.
+    """
+
+    def __init__(self, index_name, directory, ivf_lists=0, ivf_probes=8):
+        self.index_name = index_name
+        self.directory = Path(directory)
+        self.records_path = self.directory / f"{index_name}.records.json"
+        self.ivf_lists = ivf_lists
+        self.ivf_probes = ivf_probes
+
+        self._lock = threading.Lock()
+        self._pending = None
+        self._loaded_version = None
+        empty = np.empty((0, EMBEDDING_DIMENSION), dtype=np.float32)
+        self.snapshot = ([], [], empty, None, None)
+        self._load()
+
+    def _get_version(self, stat=None):
+        # os.replace gives the records file a new inode on every flush
+        if stat is None:
+            try:
+                stat = self.records_path.stat()
+            except FileNotFoundError:
+                return None
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    def _refresh(self):
+        if self._get_version() != self._loaded_version:
+            self._load()
+
+    def _load(self):
+        ids, metadata = [], []
+        matrix = np.empty((0, EMBEDDING_DIMENSION), dtype=np.float32)
+        centroids = assignments = None
+
+        try:
+            with open(self.records_path, encoding="utf-8") as records_file:
+                # Versioned from the open file, whatever replaces it meanwhile
+                version = self._get_version(os.fstat(records_file.fileno()))
+                records = json.load(records_file)
+            ids, metadata = records["ids"], records["metadata"]
+            if ids:
+                # Stores flushed before files were named per flush used index.npy
+                matrix_name = records.get("matrix", f"{self.index_name}.npy")
+                matrix = np.load(self.directory / matrix_name, mmap_mode="r")
+            if self.ivf_lists and records.get("ivf"):
+                with np.load(self.directory / records["ivf"]) as ivf:
+                    centroids, assignments = ivf["centroids"], ivf["assignments"]
+        except FileNotFoundError:
+            if self.records_path.exists():
+                # A newer flush removed these files after we read the records
+                logger.warning(
+                    "Local vector store changed mid-load, keeping old snapshot"
+                )
+                return
+            version = None
+
+        if len(matrix) != len(ids):
+            logger.warning("Local vector store files disagree, keeping old snapshot")
+            return
+
+        # Swapped in one assignment so a concurrent query never mixes versions
+        self.snapshot = (ids, metadata, matrix, centroids, assignments)
+        self._loaded_version = version
+
+    def _pending_rows(self):
+        # Writes are collected in a dict keyed by id and written out on flush
+        if self._pending is None:
+            self._refresh()
+            ids, metadata, matrix, *_ = self.snapshot
+            self._pending = {
+                vector_id: (np.asarray(matrix[row]), metadata[row])
+                for row, vector_id in enumerate(ids)
+            }
+        return self._pending
+
+    def ensure_index(self, recreate=False):
+        with self._lock:
+            if recreate:
+                self._pending = {}
+            if self._pending is None:
+                self._refresh()
+                return not self.snapshot[0]
+            return not self._pending
+
+    def upsert(self, vectors):
+        with self._lock:
+            pending = self._pending_rows()
+            for vector_id, values, metadata in vectors:
+                pending[vector_id] = (normalize(values), metadata)
+
+    def delete(self, ids):
+        with self._lock:
+            pending = self._pending_rows()
+            for vector_id in ids:
+                pending.pop(vector_id, None)
+
+    def flush(self):
+        with self._lock:
+            if self._pending is None:
+                return
+
+            ids = list(self._pending)
+            metadata = [self._pending[vector_id][1] for vector_id in ids]
+            matrix = np.empty((len(ids), EMBEDDING_DIMENSION), dtype=np.float32)
+            for row, vector_id in enumerate(ids):
+                matrix[row] = self._pending[vector_id][0]
+
+            self.directory.mkdir(parents=True, exist_ok=True)
+            generation = uuid.uuid4().hex
+            matrix_name = f"{self.index_name}.{generation}.npy"
+            write_atomically(self.directory / matrix_name, lambda f: np.save(f, matrix))
+            ivf_name = None
+            if self.ivf_lists and len(ids) > self.ivf_lists:
+                centroids, assignments = build_ivf(matrix, self.ivf_lists)
+                ivf_name = f"{self.index_name}.{generation}.ivf.npz"
+                write_atomically(
+                    self.directory / ivf_name,
+                    lambda f: np.savez(f, centroids=centroids, assignments=assignments),
+                )
+            records = {
+                "matrix": matrix_name,
+                "ivf": ivf_name,
+                "ids": ids,
+                "metadata": metadata,
+            }
+            write_atomically(
+                self.records_path,
+                lambda f: f.write(json.dumps(records).encode("utf-8")),
+            )
+            self._remove_stale_files(keep={matrix_name, ivf_name})
+
+            self._pending = None
+            self._load()
+
+    def _remove_stale_files(self, keep):
+        # Readers that already mapped an older matrix keep their open handle
+        for path in self.directory.glob(f"{self.index_name}.*"):
+            if path.suffix in (".npy", ".npz") and path.name not in keep:
+                path.unlink(missing_ok=True)
+
+    def query(self, vector, top_k):
+        self._refresh()
+        ids, metadata, matrix, centroids, assignments = self.snapshot
+        if not ids or top_k <= 0:
+            return []
+
+        query_vector = normalize(vector)
+        if centroids is not None:
+            probes = min(self.ivf_probes, len(centroids))
+            closest = np.argpartition(centroids @ query_vector, -probes)[-probes:]
+            rows = np.flatnonzero(np.isin(assignments, closest))
+            scores = matrix[rows] @ query_vector
+        else:
+            rows = None
+            scores = matrix @ query_vector
+
+        top_k = min(top_k, len(scores))
+        if not top_k:
+            return []
+        best = np.argpartition(scores, -top_k)[-top_k:]
+        best = best[np.argsort(scores[best])[::-1]]
+        best_rows = best if rows is None else rows[best]
+        return [
+            {
+                "id": ids[row],
+                "score": float(scores[position]),
+                "metadata": metadata[row],
+            }
+            for position, row in zip(best, best_rows)
+        ]
+
+
+def normalize(values):
+    vector = np.asarray(values, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def build_ivf(matrix, n_lists, iterations=10, seed=0):
+    """Spherical k-means over the normalized rows."""
+    rng = np.random.default_rng(seed)
+    centroids = matrix[rng.choice(len(matrix), n_lists, replace=False)].copy()
+    for _ in range(iterations):
+        assignments = np.argmax(matrix @ centroids.T, axis=1)
+        for cluster in range(n_lists):
+            members = matrix[assignments == cluster]
+            if len(members):
+                centroids[cluster] = normalize(members.sum(axis=0))
+    assignments = np.argmax(matrix @ centroids.T, axis=1)
+    return centroids, assignments
+
+
+def write_atomically(path, write):
+    temp_path = path.with_suffix(".tmp")
+    with open(temp_path, "wb") as temp_file:
+        write(temp_file)
+    os.replace(temp_path, path)
+
+
+VECTOR_STORE_BACKENDS = {
+    "pinecone": lambda: PineconeVectorStore(settings.PINECONE_INDEX_NAME),
+    "local": lambda: LocalVectorStore(
+        settings.PINECONE_INDEX_NAME,
+        settings.LOCAL_VECTOR_STORE_DIR,
+        ivf_lists=settings.LOCAL_VECTOR_IVF_LISTS,
+        ivf_probes=settings.LOCAL_VECTOR_IVF_PROBES,
+    ),
+}
+
+
+@lru_cache(maxsize=None)
+def get_vector_store(backend=None):
+    """Returns the process-wide store for `backend` or VECTOR_STORE_BACKEND."""
+    return VECTOR_STORE_BACKENDS[backend or settings.VECTOR_STORE_BACKEND]()
@@ -1,4 +1,112 @@
+import asyncio
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+import boto3
+import httpx
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
 from django.conf import settings
 from openai import AsyncOpenAI
 
-openai_client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+
+def create_openai_client():
+    """Builds an AsyncOpenAI client on a keep-alive HTTP connection pool."""
+    return AsyncOpenAI(
+        api_key=settings.OPENAI_API_KEY,
+        timeout=settings.OPENAI_TIMEOUT,
+        http_client=httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=settings.OPENAI_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.OPENAI_KEEPALIVE_EXPIRY,
+            ),
+            timeout=settings.OPENAI_TIMEOUT,
+        ),
+    )
+
+
+openai_client = create_openai_client()
+
+# Async clients keep connection pools that are bound to the event loop they
+# were created on. Celery tasks run through async_to_sync get a fresh loop per
+# call, so clients are cached per running loop instead of per module.
+_loop_clients = weakref.WeakKeyDictionary()
+
+
+def loop_local(name, factory):
+    """Returns the client registered under `name` for the running event loop."""
+    loop = asyncio.get_running_loop()
+    clients = _loop_clients.setdefault(loop, {})
+    if name not in clients:
+        clients[name] = factory()
+    return clients[name]
+
+
+def get_redis_client():
+    """Returns the shared asyncio Redis client, or None if REDIS_URL is not set."""
+    redis_url = getattr(settings, "REDIS_URL", None)
+    if not redis_url:
+        return None
+
+    def create_client():
+        from redis import asyncio as aioredis
+
+        return aioredis.Redis.from_url(redis_url)
+
+    return loop_local("redis", create_client)
+
+
+def get_openai_client():
+    """Returns the pooled AsyncOpenAI client for the running event loop."""
+    return loop_local("openai", create_openai_client)
+
+
+def get_openai_semaphore():
+    """Caps the number of in-flight OpenAI requests on the running event loop."""
+    return loop_local(
+        "openai-semaphore",
+        lambda: asyncio.Semaphore(settings.OPENAI_MAX_CONCURRENT_REQUESTS),
+    )
+
+
+@lru_cache(maxsize=None)
+def get_s3_client():
+    """
+    Returns the process-wide S3 client. boto3 clients are thread-safe, so one
+    client and its connection pool serve every upload. Set AWS_S3_ENDPOINT_URL
+    to point it at a local stand-in such as a moto server.
+    """
+    # A dedicated session, the default one is not safe to create clients from
+    # concurrently
+    session = boto3.session.Session(
+        aws_access_key_id=getattr(settings, "AWS_ACCESS_KEY_ID", None),
+        aws_secret_access_key=getattr(settings, "AWS_SECRET_ACCESS_KEY", None),
+    )
+    return session.client(
+        "s3",
+        endpoint_url=settings.AWS_S3_ENDPOINT_URL,
+        config=Config(
+            max_pool_connections=settings.AWS_S3_MAX_POOL_CONNECTIONS,
+            retries={"max_attempts": 3, "mode": "standard"},
+        ),
+    )
+
+
+@lru_cache(maxsize=None)
+def get_s3_transfer_config():
+    """Streams uploads in chunks and switches to multipart for large files."""
+    return TransferConfig(
+        multipart_threshold=settings.AWS_S3_MULTIPART_THRESHOLD,
+        multipart_chunksize=settings.AWS_S3_MULTIPART_CHUNKSIZE,
+        max_concurrency=settings.AWS_S3_UPLOAD_WORKERS,
+    )
+
+
+@lru_cache(maxsize=None)
+def get_s3_upload_executor():
+    """Bounds how many blocking uploads run at once across the process."""
+    return ThreadPoolExecutor(
+        max_workers=settings.AWS_S3_UPLOAD_WORKERS, thread_name_prefix="s3-upload"
+    )
@@ -0,0 +1,173 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+from koda.config.base_config import get_redis_client
+from koda.config.logging_config import configure_logger
+
+logger = configure_logger(__name__)
+
+
+def make_cache_key(*parts):
+    """Builds a content-addressed key from any JSON-serializable parts."""
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class BaseCache:
+    """
+    Async key/value cache with a TTL, an LRU bound and hit/miss counters.
+    Values are stored JSON-encoded so callers never share mutable objects.
+    """
+
+    def __init__(self, namespace, ttl, max_entries):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, key):
+        raw = await self._get(key)
+        if raw is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(raw)
+
+    async def set(self, key, value):
+        await self._set(key, json.dumps(value))
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "namespace": self.namespace,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    async def _get(self, key):
+        raise NotImplementedError
+
+    async def _set(self, key, raw):
+        raise NotImplementedError
+
+
+class DummyCache(BaseCache):
+    async def _get(self, key):
+        return None
+
+    async def _set(self, key, raw):
+        pass
+
+
+class LocMemCache(BaseCache):
+    def __init__(self, namespace, ttl, max_entries):
+        super().__init__(namespace, ttl, max_entries)
+        self._entries = OrderedDict()
+        # Entries are shared between event loops running in different threads
+        self._lock = threading.Lock()
+
+    async def _get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, raw = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return raw
+
+    async def _set(self, key, raw):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, raw)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class RedisCache(BaseCache):
+    """
+    Stores entries with SETEX and keeps a sorted set of last-access times per
+    namespace so the least recently used keys can be evicted past max_entries.
+    """
+
+    def __init__(self, namespace, ttl, max_entries):
+        super().__init__(namespace, ttl, max_entries)
+        self.lru_key = f"{namespace}:lru"
+
+    def _key(self, key):
+        return f"{self.namespace}:{key}"
+
+    async def _get(self, key):
+        from redis import RedisError
+
+        redis = get_redis_client()
+        try:
+            raw = await redis.get(self._key(key))
+            if raw is not None:
+                await redis.zadd(self.lru_key, {key: time.time()})
+            return raw
+        except RedisError as e:
+            logger.warning(f"Cache read failed for {self.namespace}: {e}")
+            return None
+
+    async def _set(self, key, raw):
+        from redis import RedisError
+
+        redis = get_redis_client()
+        try:
+            async with redis.pipeline(transaction=False) as pipe:
+                pipe.setex(self._key(key), self.ttl, raw)
+                pipe.zadd(self.lru_key, {key: time.time()})
+                pipe.zcard(self.lru_key)
+                *_, size = await pipe.execute()
+
+            if size > self.max_entries:
+                evicted = await redis.zpopmin(self.lru_key, size - self.max_entries)
+                if evicted:
+                    await redis.delete(
+                        *[self._key(member.decode()) for member, _ in evicted]
+                    )
+        except RedisError as e:
+            logger.warning(f"Cache write failed for {self.namespace}: {e}")
+
+
+CACHE_BACKENDS = {
+    "dummy": DummyCache,
+    "locmem": LocMemCache,
+    "redis": RedisCache,
+}
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_cache(namespace, backend=None, ttl=None, max_entries=None):
+    """
+    Returns the process-wide cache for `namespace`. The backend falls back to
+    the local-memory cache when Redis is selected but REDIS_URL is not set.
+    """
+    with _caches_lock:
+        if namespace in _caches:
+            return _caches[namespace]
+
+        backend = backend or settings.LLM_CACHE_BACKEND
+        if backend == "redis" and not getattr(settings, "REDIS_URL", None):
+            logger.warning("REDIS_URL is not set, falling back to locmem cache")
+            backend = "locmem"
+
+        cache = CACHE_BACKENDS[backend](
+            namespace,
+            ttl=ttl or settings.LLM_CACHE_TTL,
+            max_entries=max_entries or settings.LLM_CACHE_MAX_ENTRIES,
+        )
+        _caches[namespace] = cache
+        return cache
@@ -222,8 +222,98 @@ ADMIN_PASSWORD = config("ADMIN_PASSWORD")
 # ==> OPENAI
 OPENAI_API_KEY = config("OPENAI_API_KEY")
 ASSISTANT_ID = config("ASSISTANT_ID")
+ASSISTANT_RUN_TIMEOUT = config("ASSISTANT_RUN_TIMEOUT", default=30, cast=float)  # seconds
+ASSISTANT_POLL_INITIAL_DELAY = config(
+    "ASSISTANT_POLL_INITIAL_DELAY", default=0.1, cast=float
+)  # seconds
+ASSISTANT_POLL_MAX_DELAY = config("ASSISTANT_POLL_MAX_DELAY", default=1.5, cast=float)
+ASSISTANT_THREAD_POOL_SIZE = config("ASSISTANT_THREAD_POOL_SIZE", default=10, cast=int)
+ASSISTANT_THREAD_POOL_TTL = config(
+    "ASSISTANT_THREAD_POOL_TTL", default=60 * 60, cast=int
+)  # seconds
+MESSAGE_BUFFER_FLUSH_SIZE = config("MESSAGE_BUFFER_FLUSH_SIZE", default=10, cast=int)
+MESSAGE_BUFFER_FLUSH_INTERVAL = config(
+    "MESSAGE_BUFFER_FLUSH_INTERVAL", default=5, cast=float
+)  # seconds
+CONVERSATION_MAX_MESSAGES = config("CONVERSATION_MAX_MESSAGES", default=200, cast=int)
+CONVERSATION_HISTORY_TOKEN_BUDGET = config(
+    "CONVERSATION_HISTORY_TOKEN_BUDGET", default=3000, cast=int
+)
 MODEL_NAME = config("MODEL_NAME")
 os.environ["OPENAI_API_KEY"] = OPENAI_API_KEY
+OPENAI_TIMEOUT = config("OPENAI_TIMEOUT", default=120, cast=float)  # seconds
+OPENAI_MAX_CONNECTIONS = config("OPENAI_MAX_CONNECTIONS", default=50, cast=int)
+OPENAI_MAX_KEEPALIVE_CONNECTIONS = config(
+    "OPENAI_MAX_KEEPALIVE_CONNECTIONS", default=20, cast=int
+)
+OPENAI_KEEPALIVE_EXPIRY = config("OPENAI_KEEPALIVE_EXPIRY", default=30, cast=float)
+OPENAI_MAX_CONCURRENT_REQUESTS = config(
+    "OPENAI_MAX_CONCURRENT_REQUESTS", default=16, cast=int
+)
+
+# ==> LLM RESPONSE CACHE
+LLM_CACHE_BACKEND = config("LLM_CACHE_BACKEND", default="locmem")  # locmem/redis/dummy
+LLM_CACHE_TTL = config("LLM_CACHE_TTL", default=60 * 60 * 24, cast=int)  # seconds
+LLM_CACHE_MAX_ENTRIES = config("LLM_CACHE_MAX_ENTRIES", default=1000, cast=int)
+
+# ==> DOCUMENT PIPELINES
+FEEDBACK_STAGE_TIMEOUT = config("FEEDBACK_STAGE_TIMEOUT", default=120, cast=int)  # seconds
+RESUME_STREAM_QUEUE_SIZE = config("RESUME_STREAM_QUEUE_SIZE", default=64, cast=int)
+JOB_POST_LOCK_TIMEOUT = config("JOB_POST_LOCK_TIMEOUT", default=300, cast=int)  # seconds
+BATCH_OPTIMIZATION_CONCURRENCY = config(
+    "BATCH_OPTIMIZATION_CONCURRENCY", default=5, cast=int
+)
+PDF_RENDER_WORKERS = config("PDF_RENDER_WORKERS", default=2, cast=int)  # threads per process
+PDF_TEMPLATE_VERSION = config("PDF_TEMPLATE_VERSION", default="1")  # bump on layout changes
+PDF_VISION_MAX_CONCURRENCY = config("PDF_VISION_MAX_CONCURRENCY", default=8, cast=int)
+PDF_VISION_MAX_ATTEMPTS = config("PDF_VISION_MAX_ATTEMPTS", default=3, cast=int)
+PDF_VISION_RETRY_BASE_DELAY = config(
+    "PDF_VISION_RETRY_BASE_DELAY", default=1, cast=float
+)  # seconds
+PDF_VISION_RETRY_MAX_DELAY = config(
+    "PDF_VISION_RETRY_MAX_DELAY", default=10, cast=float
+)  # seconds
+
+# ==> S3 UPLOADS
+AWS_S3_ENDPOINT_URL = config("AWS_S3_ENDPOINT_URL", default=None)  # e.g. a moto server
+AWS_S3_MAX_POOL_CONNECTIONS = config("AWS_S3_MAX_POOL_CONNECTIONS", default=50, cast=int)
+AWS_S3_UPLOAD_WORKERS = config("AWS_S3_UPLOAD_WORKERS", default=8, cast=int)
+AWS_S3_MULTIPART_THRESHOLD = config(
+    "AWS_S3_MULTIPART_THRESHOLD", default=8 * 1024 * 1024, cast=int
+)  # bytes
+AWS_S3_MULTIPART_CHUNKSIZE = config(
+    "AWS_S3_MULTIPART_CHUNKSIZE", default=8 * 1024 * 1024, cast=int
+)  # bytes
+
+# ==> KNOWLEDGE BASE INGESTION
+EMBEDDING_MODEL = config("EMBEDDING_MODEL", default="text-embedding-ada-002")
+EMBEDDING_BATCH_SIZE = config("EMBEDDING_BATCH_SIZE", default=100, cast=int)  # inputs
+EMBEDDING_BATCH_TOKEN_BUDGET = config(
+    "EMBEDDING_BATCH_TOKEN_BUDGET", default=100_000, cast=int
+)  # tokens per request
+EMBEDDING_MAX_CONCURRENCY = config("EMBEDDING_MAX_CONCURRENCY", default=4, cast=int)
+EMBEDDING_MAX_RETRIES = config("EMBEDDING_MAX_RETRIES", default=5, cast=int)
+KNOWLEDGE_MANIFEST_PREFIX = config(
+    "KNOWLEDGE_MANIFEST_PREFIX", default="media/knowledge_manifests"
+)  # in AWS_STORAGE_BUCKET_NAME, outside the scraped_data directories
+KNOWLEDGE_MANIFEST_DIR = config(
+    "KNOWLEDGE_MANIFEST_DIR", default=None
+)  # set to keep manifests on a local, persistent volume instead
+
+# ==> VECTOR STORE
+VECTOR_STORE_BACKEND = config("VECTOR_STORE_BACKEND", default="pinecone")  # pinecone/local
+LOCAL_VECTOR_STORE_DIR = config(
+    "LOCAL_VECTOR_STORE_DIR", default=str(BASE_DIR / "vector_store")
+)  # mount a persistent volume here
+LOCAL_VECTOR_IVF_LISTS = config("LOCAL_VECTOR_IVF_LISTS", default=0, cast=int)  # 0 = brute force
+LOCAL_VECTOR_IVF_PROBES = config("LOCAL_VECTOR_IVF_PROBES", default=8, cast=int)
+
+# ==> KNOWLEDGE QUERY CACHE
+# Index syncs run outside the Daphne process, they only retire its cached matches
+# through a shared backend. locmem keeps serving them until QUERY_CACHE_TTL.
+QUERY_CACHE_BACKEND = config("QUERY_CACHE_BACKEND", default="redis")  # redis/locmem/dummy
+QUERY_CACHE_TTL = config("QUERY_CACHE_TTL", default=60 * 60, cast=int)  # seconds
+QUERY_CACHE_MAX_ENTRIES = config("QUERY_CACHE_MAX_ENTRIES", default=1000, cast=int)
 
 # ==> PINECONE
 PINECONE_API_KEY = config("PINECONE_API_KEY")
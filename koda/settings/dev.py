@@ -62,6 +62,7 @@ MEDIA_ROOT = BASE_DIR / "media"
 # ==> REDIS
 REDIS_IP = "redis"
 REDIS_PORT = 6379
+REDIS_URL = f"redis://{REDIS_IP}:{REDIS_PORT}/1"
 
 # ==> CHANNELS
 # CACHES = {
@@ -69,6 +69,8 @@ STATIC_URL = f"https://{AWS_S3_CUSTOM_DOMAIN}/{AWS_LOCATION}/"
 #     }
 # }
 
+REDIS_URL = config("REDIS_URL")
+
 # ==> CHANNELS
 default_channel_layer = {
     "BACKEND": "channels_redis.core.RedisChannelLayer",
@@ -0,0 +1,85 @@
+import asyncio
+from unittest import mock
+
+import fakeredis
+from django.test import SimpleTestCase
+
+from koda.config.cache_backends import LocMemCache, RedisCache, make_cache_key
+
+
+class MakeCacheKeyTests(SimpleTestCase):
+    def test_key_ignores_dict_order(self):
+        self.assertEqual(
+            make_cache_key("R", {"a": 1, "b": 2}), make_cache_key("R", {"b": 2, "a": 1})
+        )
+        self.assertNotEqual(make_cache_key("R", "x"), make_cache_key("CL", "x"))
+
+
+class CacheTestsMixin:
+    def create_cache(self, ttl=60, max_entries=2):
+        raise NotImplementedError
+
+    async def test_round_trips_json_values(self):
+        cache = self.create_cache()
+        await cache.set("key", {"text": "value", "items": [1, 2]})
+        self.assertEqual(await cache.get("key"), {"text": "value", "items": [1, 2]})
+        self.assertIsNone(await cache.get("missing"))
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    async def test_evicts_the_least_recently_used_entry(self):
+        cache = self.create_cache(max_entries=2)
+        await cache.set("a", 1)
+        await cache.set("b", 2)
+        # Reading "a" makes "b" the least recently used
+        await cache.get("a")
+        await cache.set("c", 3)
+
+        self.assertEqual(await cache.get("a"), 1)
+        self.assertIsNone(await cache.get("b"))
+        self.assertEqual(await cache.get("c"), 3)
+
+    async def test_overwriting_does_not_evict(self):
+        cache = self.create_cache(max_entries=2)
+        await cache.set("a", 1)
+        await cache.set("b", 2)
+        await cache.set("a", 10)
+
+        self.assertEqual(await cache.get("a"), 10)
+        self.assertEqual(await cache.get("b"), 2)
+
+
+class LocMemCacheTests(CacheTestsMixin, SimpleTestCase):
+    def create_cache(self, ttl=60, max_entries=2):
+        return LocMemCache("test", ttl=ttl, max_entries=max_entries)
+
+    async def test_expired_entries_are_misses(self):
+        cache = self.create_cache(ttl=0.01)
+        await cache.set("key", "value")
+        await asyncio.sleep(0.02)
+        self.assertIsNone(await cache.get("key"))
+
+
+class RedisCacheTests(CacheTestsMixin, SimpleTestCase):
+    def setUp(self):
+        self.redis = fakeredis.FakeAsyncRedis()
+        patcher = mock.patch(
+            "koda.config.cache_backends.get_redis_client", return_value=self.redis
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def create_cache(self, ttl=60, max_entries=2):
+        return RedisCache("test", ttl=ttl, max_entries=max_entries)
+
+    async def test_eviction_removes_the_entry_and_its_lru_record(self):
+        cache = self.create_cache(max_entries=1)
+        await cache.set("a", 1)
+        await cache.set("b", 2)
+
+        self.assertEqual(set(await self.redis.keys("test:*")), {b"test:lru", b"test:b"})
+        self.assertEqual(await self.redis.zrange("test:lru", 0, -1), [b"b"])
+
+    async def test_entries_expire_with_the_ttl(self):
+        cache = self.create_cache(ttl=30)
+        await cache.set("key", "value")
+        self.assertTrue(0 < await self.redis.ttl("test:key") <= 30)
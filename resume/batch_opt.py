@@ -0,0 +1,108 @@
+from asgiref.sync import async_to_sync
+from celery import chain, group, shared_task
+from celery.result import GroupResult
+from celery.utils import uuid
+from django.conf import settings
+from more_itertools import chunked
+
+from koda.config.logging_config import configure_logger
+from resume.cl_opt import cl_optimize_func
+from resume.job_post import get_optimized_job_post
+from resume.resume_opt import resume_optimize_func
+
+logger = configure_logger(__name__)
+
+BATCH_OPTIMIZERS = {
+    "resume": resume_optimize_func,
+    "cover letter": cl_optimize_func,
+}
+
+
+@shared_task
+def prepare_job_post(job_post_id):
+    # Optimize the shared job post once, before any applicant task needs it
+    async_to_sync(get_optimized_job_post)(job_post_id)
+    return job_post_id
+
+
+@shared_task
+def optimize_batch_item(doc_type, applicant_id, job_post_id):
+    # Failures are returned rather than raised so one bad applicant does not
+    # stop the waves scheduled after it
+    try:
+        pdf_url = async_to_sync(BATCH_OPTIMIZERS[doc_type])(applicant_id, job_post_id)
+        return {"applicant_id": applicant_id, "status": "success", "pdf_url": pdf_url}
+    except Exception as e:
+        logger.error(f"Batch {doc_type} optimization failed for {applicant_id}: {e}")
+        return {"applicant_id": applicant_id, "status": "failed", "error": str(e)}
+
+
+def schedule_batch_optimization(doc_type, job_post_id, applicant_ids):
+    """Tailors one document type for many applicants against one job post.
+
+    The job post is prepared first, then applicants run in waves of
+    BATCH_OPTIMIZATION_CONCURRENCY tasks so a large batch never has more than
+    that many model pipelines in flight. The job post task is saved as the
+    batch's parent, so a failure there, which stops every wave, is reported by
+    get_batch_progress instead of leaving the items pending.
+
+    Args:
+        doc_type (str): 'resume' or 'cover letter'.
+        job_post_id (str): The job post every document is tailored to.
+        applicant_ids (list): Applicants to tailor the document for.
+
+    Returns:
+        str: Id of the saved GroupResult tracking every applicant task.
+    """
+    prepare_signature = prepare_job_post.si(job_post_id)
+    prepare_result = prepare_signature.freeze()
+
+    item_signatures = [
+        optimize_batch_item.si(doc_type, applicant_id, job_post_id)
+        for applicant_id in applicant_ids
+    ]
+    item_results = [signature.freeze() for signature in item_signatures]
+
+    waves = [
+        group(wave)
+        for wave in chunked(item_signatures, settings.BATCH_OPTIMIZATION_CONCURRENCY)
+    ]
+    chain(prepare_signature, *waves).apply_async()
+
+    batch_result = GroupResult(uuid(), item_results, parent=prepare_result)
+    batch_result.save()
+
+    logger.info(
+        f"Scheduled {doc_type} batch {batch_result.id} for job post {job_post_id} "
+        f"with {len(applicant_ids)} applicants in {len(waves)} waves"
+    )
+    return batch_result.id
+
+
+def get_batch_progress(batch_id):
+    batch_result = GroupResult.restore(batch_id)
+    if batch_result is None:
+        return None
+
+    items = [
+        {
+            "task_id": result.id,
+            "state": result.state,
+            "result": result.result if result.successful() else None,
+        }
+        for result in batch_result.results
+    ]
+    progress = {
+        "batch_id": batch_id,
+        "status": "completed" if batch_result.ready() else "running",
+        "total": len(items),
+        "completed": batch_result.completed_count(),
+        "items": items,
+    }
+
+    # The waves are chained after the job post, so none of them run if it fails
+    prepare_result = batch_result.parent
+    if prepare_result is not None and prepare_result.failed():
+        progress["status"] = "failed"
+        progress["error"] = f"Job post preparation failed: {prepare_result.result}"
+    return progress
@@ -1,13 +1,13 @@
 import asyncio
 import time
-from uuid import uuid4
+from functools import partial
 
 from asgiref.sync import async_to_sync, sync_to_async
 from celery import shared_task
 from django.conf import settings
 
 from koda.config.logging_config import configure_logger
-from resume.job_post import optimize_job
+from resume.job_post import get_optimized_job_post
 from resume.models import (
     CoverLetter,
     CoverLetterAnalysis,
@@ -25,7 +25,8 @@ from resume.utils import (
     improve_doc,
     optimize_doc,
     review_tone,
-    upload_directly_to_s3,
+    run_feedback_stages,
+    store_pdf_once,
 )
 
 logger = configure_logger(__name__)
@@ -37,19 +38,21 @@ USER_ROLE = "user"
 async def get_default_cover_letter_func(candidate_id):
     try:
         start_time = time.time()
-        s3_key = f"media/cover_letters/original/{uuid4()}.pdf"
 
         resume_content = ""
         created_cl = await create_doc(
             "cover letter", "resume", resume_content, default_cover_letter
         )
 
-        pdf = await generate_formatted_pdf(
-            created_cl, filename="Base Cover Letter.pdf", doc_type="CL"
+        s3_key = await store_pdf_once(
+            partial(
+                generate_formatted_pdf, filename="Base Cover Letter.pdf", doc_type="CL"
+            ),
+            created_cl,
+            prefix="media/cover_letters/original",
+            doc_type="cover letter",
         )
 
-        upload_directly_to_s3(pdf, settings.AWS_STORAGE_BUCKET_NAME, s3_key)
-
         cover_letter_instance, cover_letter_created = await sync_to_async(
             CoverLetter.objects.update_or_create, thread_sensitive=True
         )(
@@ -80,7 +83,6 @@ def get_default_cover_letter(candidate_id):
 async def improve_cover_letter_func(candidate_id):
     try:
         start_time = time.time()
-        s3_key = f"media/cover_letters/general_improved/{uuid4()}.pdf"
 
         cover_letter_instance = await sync_to_async(CoverLetter.objects.get)(
             cover_letter_id=candidate_id
@@ -88,17 +90,16 @@ async def improve_cover_letter_func(candidate_id):
         cover_letter_content = cover_letter_instance.original_content
 
         readability = Readability(cover_letter_content)
-        readability_feedback = await readability.get_readability_text(
-            doc_type="cover letter"
-        )
-
         polarity = Polarity(cover_letter_content)
-        polarity_feedback = await polarity.get_polarity_text(doc_type="cover letter")
-
-        tone_feedback = await review_tone(
-            doc_type="cover letter", text=cover_letter_content
+        feedbacks = await run_feedback_stages(
+            {
+                "readability": readability.get_readability_text(
+                    doc_type="cover letter"
+                ),
+                "polarity": polarity.get_polarity_text(doc_type="cover letter"),
+                "tone": review_tone(doc_type="cover letter", text=cover_letter_content),
+            }
         )
-        feedbacks = [readability_feedback, polarity_feedback, tone_feedback]
         cover_letter_feedback = "\n\n".join(feedbacks)
 
         improved_content = await improve_doc(
@@ -107,12 +108,17 @@ async def improve_cover_letter_func(candidate_id):
             doc_feedback=cover_letter_feedback,
         )
 
-        pdf = await generate_formatted_pdf(
-            improved_content, filename="Improved Cover Letter.pdf", doc_type="CL"
+        s3_key = await store_pdf_once(
+            partial(
+                generate_formatted_pdf,
+                filename="Improved Cover Letter.pdf",
+                doc_type="CL",
+            ),
+            improved_content,
+            prefix="media/cover_letters/general_improved",
+            doc_type="cover letter",
         )
 
-        upload_directly_to_s3(pdf, settings.AWS_STORAGE_BUCKET_NAME, s3_key)
-
         cover_letter_instance, cover_letter_created = await sync_to_async(
             CoverLetter.objects.update_or_create, thread_sensitive=True
         )(
@@ -149,7 +155,6 @@ def improve_cover_letter(applicant_id):
 async def customize_improved_cover_letter_func(candidate_id, custom_instruction):
     try:
         start_time = time.time()
-        s3_key = f"media/cover_letters/general_improved/{uuid4()}.pdf"
 
         cover_letter_instance = await sync_to_async(CoverLetter.objects.get)(
             cover_letter_id=candidate_id
@@ -162,14 +167,17 @@ async def customize_improved_cover_letter_func(candidate_id, custom_instruction)
             custom_instruction=custom_instruction,
         )
 
-        pdf = await generate_formatted_pdf(
+        s3_key = await store_pdf_once(
+            partial(
+                generate_formatted_pdf,
+                filename="Customized Improved Cover Letter.pdf",
+                doc_type="CL",
+            ),
             customized_content,
-            filename="Customized Improved Cover Letter.pdf",
-            doc_type="CL",
+            prefix="media/cover_letters/general_improved",
+            doc_type="cover letter",
         )
 
-        upload_directly_to_s3(pdf, settings.AWS_STORAGE_BUCKET_NAME, s3_key)
-
         cover_letter_instance, cover_letter_created = await sync_to_async(
             CoverLetter.objects.update_or_create, thread_sensitive=True
         )(
@@ -209,20 +217,8 @@ async def cl_optimize_func(applicant_id, job_post_id):
         cover_letter_id=applicant_id
     )
 
-    try:
-        job_post_instance = await sync_to_async(JobPost.objects.get)(
-            job_post_id=job_post_id
-        )
-
-        if job_post_instance.optimized_content:
-            logger.info(
-                f"JobPost {job_post_id} already optimized. Skipping optimization."
-            )
-            optimized_content_for_job_post = job_post_instance.optimized_content
-
-    except JobPost.DoesNotExist:
-        logger.info(f"JobPost {job_post_id} not optimized. Starting optimization.")
-        optimized_content_for_job_post = await optimize_job(job_post_id)
+    job_post_instance = await get_optimized_job_post(job_post_id)
+    optimized_content_for_job_post = job_post_instance.optimized_content
 
     optimized_content = await optimize_doc(
         doc_type="cover letter",
@@ -231,16 +227,16 @@ async def cl_optimize_func(applicant_id, job_post_id):
         job_description=optimized_content_for_job_post,
     )
 
-    pdf = await generate_formatted_pdf(
-        optimized_content, filename="Optimized Cover Letter.pdf", doc_type="CL"
+    # Render and upload only if this exact cover letter is not stored yet
+    s3_key = await store_pdf_once(
+        partial(
+            generate_formatted_pdf, filename="Optimized Cover Letter.pdf", doc_type="CL"
+        ),
+        optimized_content,
+        prefix="media/cover_letters/optimized",
+        doc_type="cover letter",
     )
 
-    # Generate a unique S3 key for the PDF
-    s3_key = f"media/cover_letters/optimized/{uuid4()}.pdf"
-
-    # Upload the PDF directly to S3
-    upload_directly_to_s3(pdf, settings.AWS_STORAGE_BUCKET_NAME, s3_key)
-
     optimized_content_instance, created = await sync_to_async(
         OptimizedCoverLetterContent.objects.update_or_create, thread_sensitive=True
     )(
@@ -287,17 +283,17 @@ async def customize_opt_cl(applicant_id, job_post_id, custom_instruction):
         custom_instruction=custom_instruction,
     )
 
-    pdf = await generate_formatted_pdf(
+    s3_key = await store_pdf_once(
+        partial(
+            generate_formatted_pdf,
+            filename="Customized Optimized Cover Letter.pdf",
+            doc_type="CL",
+        ),
         customized_content,
-        filename="Customized Optimized Cover Letter.pdf",
-        doc_type="CL",
+        prefix="media/cover_letters/optimized",
+        doc_type="cover letter",
     )
 
-    # Generate a unique S3 key for the PDF
-    s3_key = f"media/cover_letters/optimized/{uuid4()}.pdf"
-
-    upload_directly_to_s3(pdf, settings.AWS_STORAGE_BUCKET_NAME, s3_key)
-
     optimized_content_instance, created = await sync_to_async(
         OptimizedCoverLetterContent.objects.update_or_create, thread_sensitive=True
     )(
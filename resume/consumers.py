@@ -1,12 +1,16 @@
+import asyncio
 import json
 
 from channels.generic.websocket import AsyncWebsocketConsumer
+from django.conf import settings
 
 from koda.config.logging_config import configure_logger
-from resume.utils.util_funcs import create_docs, customize_doc
+from resume.utils.util_funcs import customize_doc, optimize_doc, stream_optimize_doc
 
 logger = configure_logger(__name__)
 
+STREAM_END = object()
+
 
 class ResumeConsumer(AsyncWebsocketConsumer):
     async def connect(self):
@@ -59,9 +63,20 @@ class ResumeConsumer(AsyncWebsocketConsumer):
                     custom_instruction=custom_instruction,
                 )
 
+            elif message_type == "creation" and text_data_json.get("stream"):
+                await self.stream_to_socket(
+                    stream_optimize_doc(
+                        doc_type="resume",
+                        doc_text=resume_content,
+                        job_description=job_post_content,
+                    )
+                )
+
             elif message_type == "creation":
-                res = await create_docs(
-                    resume_content=resume_content, job_post_content=job_post_content
+                res = await optimize_doc(
+                    doc_type="resume",
+                    doc_text=resume_content,
+                    job_description=job_post_content,
                 )
 
                 # Send message to resume group
@@ -107,3 +122,69 @@ class ResumeConsumer(AsyncWebsocketConsumer):
 
         # Send message to WebSocket
         await self.send(text_data=json.dumps({"message": message}))
+
+    # Receive the finished streamed document from resume group
+    async def resume_stream(self, event):
+        await self.send(
+            text_data=json.dumps({"event": event["event"], "data": event["data"]})
+        )
+
+    # ----------------------- STREAMING --------------------------
+    async def stream_to_socket(self, events):
+        """
+        Pushes ("token" | "section" | "error", data) events straight to this
+        socket as they arrive, and the final ("complete", document) event to the
+        resume group. The stream runs inside receive(), so frames sent to the
+        group would sit unread on this socket's channel until it finished and
+        be dropped past the channel capacity. Events pass through a bounded
+        queue, so a slow socket stops the model stream from being read instead
+        of buffering it all in memory. Tokens that pile up while a send is in
+        flight go out as one frame.
+        """
+        queue = asyncio.Queue(maxsize=settings.RESUME_STREAM_QUEUE_SIZE)
+
+        async def produce():
+            try:
+                async for event in events:
+                    await queue.put(event)
+            except Exception as e:
+                logger.error(f"Resume stream failed: {e}")
+                await queue.put(("error", str(e)))
+            finally:
+                await queue.put(STREAM_END)
+
+        producer = asyncio.create_task(produce())
+        pending = None
+        try:
+            while True:
+                event = pending if pending is not None else await queue.get()
+                pending = None
+                if event is STREAM_END:
+                    break
+
+                event_type, data = event
+                if event_type == "token":
+                    tokens = [data]
+                    while not queue.empty():
+                        next_event = queue.get_nowait()
+                        if next_event is STREAM_END or next_event[0] != "token":
+                            pending = next_event
+                            break
+                        tokens.append(next_event[1])
+                    data = "".join(tokens)
+
+                await self.send_stream_frame(event_type, data)
+        finally:
+            producer.cancel()
+
+    async def send_stream_frame(self, event_type, data):
+        if event_type == "complete":
+            # One frame per stream, the group's other sockets get the document
+            await self.channel_layer.group_send(
+                self.resume_group_name,
+                {"type": "resume_stream", "event": event_type, "data": data},
+            )
+        else:
+            await self.send(text_data=json.dumps({"event": event_type, "data": data}))
+
+    # ----------------------- STREAMING --------------------------
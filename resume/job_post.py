@@ -1,8 +1,11 @@
+import asyncio
 import time
 
 from asgiref.sync import async_to_sync, sync_to_async
 from celery import shared_task
+from django.conf import settings
 
+from koda.config.base_config import get_redis_client, loop_local
 from koda.config.logging_config import configure_logger
 from resume.models import JobPost
 from resume.utils import get_job_post_feedback, improve_doc
@@ -36,6 +39,75 @@ async def optimize_job(job_post_id):
     return job_post_instance.optimized_content
 
 
+async def get_optimized_job_post(job_post_id):
+    """
+    Returns the JobPost for job_post_id with its optimized content, running
+    optimize_job at most once however many applications arrive together.
+    Callers in this process await the same task; callers in other workers wait
+    on a Redis lock and then read the result back from JobPost.
+    """
+    job_post_instance = await get_existing_optimized_job_post(job_post_id)
+    if job_post_instance:
+        logger.info(f"JobPost {job_post_id} already optimized. Skipping optimization.")
+        return job_post_instance
+
+    inflight = loop_local("job-post-optimizations", dict)
+    task = inflight.get(job_post_id)
+    if task is None:
+        logger.info(f"JobPost {job_post_id} not optimized. Starting optimization.")
+        task = asyncio.ensure_future(optimize_job_once(job_post_id))
+        inflight[job_post_id] = task
+        task.add_done_callback(lambda _: inflight.pop(job_post_id, None))
+    else:
+        logger.info(f"JobPost {job_post_id} optimization in flight. Waiting for it.")
+
+    # Shielded so one cancelled waiter does not cancel the shared optimization
+    return await asyncio.shield(task)
+
+
+async def get_existing_optimized_job_post(job_post_id):
+    job_post_instance = await sync_to_async(
+        JobPost.objects.filter(job_post_id=job_post_id).first
+    )()
+    if job_post_instance and job_post_instance.optimized_content:
+        return job_post_instance
+    return None
+
+
+async def optimize_job_once(job_post_id):
+    from redis.exceptions import LockError
+
+    redis = get_redis_client()
+    lock = None
+    if redis is not None:
+        lock = redis.lock(
+            f"job-post-optimization:{job_post_id}",
+            timeout=settings.JOB_POST_LOCK_TIMEOUT,
+            blocking_timeout=settings.JOB_POST_LOCK_TIMEOUT,
+        )
+        if not await lock.acquire():
+            logger.warning(
+                f"Timed out waiting for JobPost {job_post_id} lock. Optimizing anyway."
+            )
+            lock = None
+
+    try:
+        # Another worker may have finished while this one waited for the lock
+        job_post_instance = await get_existing_optimized_job_post(job_post_id)
+        if job_post_instance is None:
+            await optimize_job(job_post_id)
+            job_post_instance = await sync_to_async(JobPost.objects.get)(
+                job_post_id=job_post_id
+            )
+        return job_post_instance
+    finally:
+        if lock is not None:
+            try:
+                await lock.release()
+            except LockError as e:
+                logger.warning(f"JobPost {job_post_id} lock already released: {e}")
+
+
 @shared_task
 def optimize_job_post(job_post_id):
     start_time = time.time()
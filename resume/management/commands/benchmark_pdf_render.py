@@ -0,0 +1,66 @@
+import logging
+import statistics
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+
+from resume.pdf_gen import generate_resume_pdf, improved_resume_dict
+
+
+class Command(BaseCommand):
+    help = "Renders the sample resume repeatedly and reports latency and allocations"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=1000)
+        parser.add_argument(
+            "--memory-iterations",
+            type=int,
+            default=100,
+            help="Renders traced with tracemalloc, kept apart from the timed runs",
+        )
+
+    def handle(self, *args, **options):
+        iterations = options["iterations"]
+        memory_iterations = options["memory_iterations"]
+
+        # Every render logs its creation time
+        logging.getLogger("resume.pdf_gen").setLevel(logging.WARNING)
+
+        # The first render compiles the template and loads the fonts
+        start_time = time.perf_counter()
+        generate_resume_pdf(improved_resume_dict, filename="benchmark.pdf")
+        first_render = (time.perf_counter() - start_time) * 1000
+
+        timings = []
+        for _ in range(iterations):
+            start_time = time.perf_counter()
+            generate_resume_pdf(improved_resume_dict, filename="benchmark.pdf")
+            timings.append((time.perf_counter() - start_time) * 1000)
+
+        peaks = []
+        tracemalloc.start()
+        for _ in range(memory_iterations):
+            tracemalloc.reset_peak()
+            baseline, _ = tracemalloc.get_traced_memory()
+            generate_resume_pdf(improved_resume_dict, filename="benchmark.pdf")
+            _, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - baseline)
+        retained, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        timings.sort()
+        self.stdout.write(f"First render: {first_render:.2f} ms")
+        self.stdout.write(
+            f"{iterations} renders: "
+            f"mean {statistics.mean(timings):.2f} ms, "
+            f"p50 {timings[len(timings) // 2]:.2f} ms, "
+            f"p95 {timings[int(len(timings) * 0.95) - 1]:.2f} ms, "
+            f"max {timings[-1]:.2f} ms"
+        )
+        self.stdout.write(
+            f"{memory_iterations} traced renders: "
+            f"mean peak {statistics.mean(peaks) / 1024:.1f} KiB per render, "
+            f"{retained / 1024:.1f} KiB retained"
+        )
+        self.stdout.write(self.style.SUCCESS("PDF render benchmark complete"))
@@ -1,5 +1,6 @@
 # from weasyprint import HTML
 import time
+from functools import lru_cache
 from io import BytesIO
 
 from django.core.files.base import ContentFile
@@ -7,6 +8,7 @@ from reportlab.lib import colors
 from reportlab.lib.enums import TA_JUSTIFY, TA_LEFT, TA_RIGHT
 from reportlab.lib.pagesizes import letter
 from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.lib.units import inch
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
 from reportlab.pdfgen import canvas
@@ -162,28 +164,65 @@ doc_style_l = ParagraphStyle(
 )
 
 
+company_table_style = TableStyle(
+    [
+        ("VALIGN", (0, 0), (-1, -1), "TOP"),
+        ("ALIGN", (0, 0), (0, -1), "LEFT"),
+        ("ALIGN", (1, 0), (1, -1), "RIGHT"),
+        ("TOPPADDING", (0, 0), (-1, -1), 0),
+        ("BOTTOMPADDING", (0, 0), (-1, -1), 0),
+    ]
+)
+
+
+class CompiledResumeTemplate:
+    """
+    Layout measurements of the resume, computed once per process: frame width
+    and column widths. Flowables keep state from wrap and split, so spacers,
+    rules and headers are built fresh for every use instead of being shared
+    between renders.
+    """
+
+    section_space = 8
+    header_space = 6
+    entry_space = 5
+
+    def __init__(self, pagesize=letter, top_margin=36):
+        self.pagesize = pagesize
+        self.top_margin = top_margin
+
+        # SimpleDocTemplate keeps its default one inch left and right margins
+        self.width = pagesize[0] - 2 * inch
+        self.half_columns = [self.width * 0.5, self.width * 0.5]
+        self.wide_columns = [self.width * 0.75, self.width * 0.25]
+
+    def section_spacer(self):
+        return Spacer(1, self.section_space)
+
+    def entry_spacer(self):
+        return Spacer(1, self.entry_space)
+
+    def section_header(self, header_text, style=header_style):
+        return [
+            Paragraph(header_text, style),
+            HRFlowable(width=self.width),
+            Spacer(1, self.header_space),
+        ]
+
+
+@lru_cache(maxsize=None)
+def get_resume_template(pagesize=letter, top_margin=36):
+    return CompiledResumeTemplate(pagesize=pagesize, top_margin=top_margin)
+
+
 # Function to create and style a header with an HRFlowable and Spacer
 def add_header_with_line(doc=None, story=None, header_text=None, style=header_style):
-    story.append(Paragraph(header_text, style))
-    story.append(HRFlowable(width=doc.width))
-    story.append(Spacer(1, 6))
+    story.extend(get_resume_template().section_header(header_text, style))
 
 
 # Function to create a table for company details and job description
 def create_company_table(data, col_widths):
-    return Table(
-        data,
-        colWidths=col_widths,
-        style=TableStyle(
-            [
-                ("VALIGN", (0, 0), (-1, -1), "TOP"),
-                ("ALIGN", (0, 0), (0, -1), "LEFT"),
-                ("ALIGN", (1, 0), (1, -1), "RIGHT"),
-                ("TOPPADDING", (0, 0), (-1, -1), 0),
-                ("BOTTOMPADDING", (0, 0), (-1, -1), 0),
-            ]
-        ),
-    )
+    return Table(data, colWidths=col_widths, style=company_table_style)
 
 
 # Function to create a styled Paragraph with an optional hyperlink
@@ -254,20 +293,21 @@ def add_experiences(doc, story, exp_dict):
         # Add a company table
         company_table_data = [[company_name, duration], [job_role, location]]
         story.append(
-            create_company_table(company_table_data, [doc.width * 0.5, doc.width * 0.5])
+            create_company_table(
+                company_table_data, get_resume_template().half_columns
+            )
         )
 
         # Add job descriptions
         story.append(create_bullet_list(job_description_list, job_desc_style))
-        story.append(Spacer(1, 5))
+        story.append(get_resume_template().entry_spacer())
 
 
 # Function to add education
 def add_education(doc, story, edu_list):
     add_header_with_line(doc=doc, story=story, header_text="EDUCATION")
 
-    column_width_large = doc.width * 0.75
-    column_width_small = doc.width * 0.25
+    wide_columns = get_resume_template().wide_columns
 
     for edu in edu_list:
         degree_text = edu.get("degree", "")
@@ -283,9 +323,7 @@ def add_education(doc, story, edu_list):
         # Add a education table
         education_table_data = [[institution, end_date], [degree, location]]
         story.append(
-            create_company_table(
-                education_table_data, [column_width_large, column_width_small]
-            )
+            create_company_table(education_table_data, wide_columns)
         )
 
 
@@ -301,8 +339,7 @@ def add_skills(doc=None, story=None, skill_list=None):
 def add_certifications(doc=None, story=None, cert_list=None):
     add_header_with_line(doc=doc, story=story, header_text="CERTIFICATIONS")
 
-    column_width_large = doc.width * 0.75
-    column_width_small = doc.width * 0.25
+    wide_columns = get_resume_template().wide_columns
 
     for cert in cert_list:
         title_text = cert.get("title", "")
@@ -317,9 +354,7 @@ def add_certifications(doc=None, story=None, cert_list=None):
         # Add a education table
         certification_table_data = [[certification_title, date]]
         story.append(
-            create_company_table(
-                certification_table_data, [column_width_large, column_width_small]
-            )
+            create_company_table(certification_table_data, wide_columns)
         )
 
 
@@ -337,27 +372,30 @@ def generate_resume_pdf(improved_resume_dict, filename):
     pdf_buffer = BytesIO()
 
     # Create a PDF document
-    doc = SimpleDocTemplate(pdf_buffer, pagesize=letter, topMargin=36)
+    template = get_resume_template()
+    doc = SimpleDocTemplate(
+        pdf_buffer, pagesize=template.pagesize, topMargin=template.top_margin
+    )
     story = []
 
     # Add sections to the document
     add_contact_info(story, improved_resume_dict.get("contact", ""))
-    story.append(Spacer(1, 8))  # Add some space before the next section
+    story.append(template.section_spacer())  # Add some space before the next section
     add_summary(
         doc=doc,
         story=story,
         summary_text=improved_resume_dict.get("summary", ""),
     )
-    story.append(Spacer(1, 8))
+    story.append(template.section_spacer())
     add_experiences(doc, story, improved_resume_dict.get("experiences", ""))
-    story.append(Spacer(1, 8))
+    story.append(template.section_spacer())
     add_education(doc, story, improved_resume_dict.get("education", ""))
-    story.append(Spacer(1, 8))
+    story.append(template.section_spacer())
     add_skills(doc, story, improved_resume_dict.get("skills", ""))
-    story.append(Spacer(1, 8))
+    story.append(template.section_spacer())
     add_certifications(doc, story, improved_resume_dict.get("certifications", ""))
     # Optionally add projects if required
-    # story.append(Spacer(1, 8))
+    # story.append(template.section_spacer())
     # add_projects(story, improved_resume_dict["projects"])
 
     # Build the PDF
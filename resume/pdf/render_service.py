@@ -0,0 +1,56 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from celery.signals import worker_process_shutdown
+from django.conf import settings
+
+from koda.config.logging_config import configure_logger
+
+logger = configure_logger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def create_render_executor():
+    """
+    Builds the thread pool PDF renders run on. It keeps ReportLab off the event
+    loop, but renders on it still share the GIL. PDFs are rendered inside Celery
+    prefork children, which are daemonic and cannot start a process pool, so
+    CPU parallelism across documents comes from the worker concurrency instead.
+    """
+    return ThreadPoolExecutor(
+        max_workers=settings.PDF_RENDER_WORKERS, thread_name_prefix="pdf-render"
+    )
+
+
+def get_render_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = create_render_executor()
+        return _executor
+
+
+async def render_pdf(build_func, *args):
+    """Runs a PDF builder on the render threads and returns the PDF bytes.
+
+    Args:
+        build_func (callable): Function returning PDF bytes.
+        *args: Arguments passed to `build_func`.
+
+    Returns:
+        bytes: The rendered PDF.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_render_executor(), build_func, *args)
+
+
+@worker_process_shutdown.connect
+def shutdown_render_executor(**kwargs):
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown()
@@ -1,4 +1,5 @@
 import time
+from functools import lru_cache
 from io import BytesIO
 
 from django.core.files.base import ContentFile
@@ -6,6 +7,7 @@ from reportlab.lib import colors
 from reportlab.lib.enums import TA_JUSTIFY, TA_LEFT, TA_RIGHT
 from reportlab.lib.pagesizes import letter
 from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.lib.units import inch
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
 from reportlab.pdfgen import canvas
@@ -21,6 +23,7 @@ from reportlab.platypus import (
 )
 
 from koda.config.logging_config import configure_logger
+from resume.pdf.render_service import render_pdf
 from resume.samples import improved_resume_dict
 from resume.utils import get_value
 
@@ -159,28 +162,65 @@ doc_style_l = ParagraphStyle(
 )
 
 
+company_table_style = TableStyle(
+    [
+        ("VALIGN", (0, 0), (-1, -1), "TOP"),
+        ("ALIGN", (0, 0), (0, -1), "LEFT"),
+        ("ALIGN", (1, 0), (1, -1), "RIGHT"),
+        ("TOPPADDING", (0, 0), (-1, -1), 0),
+        ("BOTTOMPADDING", (0, 0), (-1, -1), 0),
+    ]
+)
+
+
+class CompiledResumeTemplate:
+    """
+    Layout measurements of the resume, computed once per process: frame width
+    and column widths. Flowables keep state from wrap and split, so spacers,
+    rules and headers are built fresh for every use instead of being shared
+    between renders.
+    """
+
+    section_space = 8
+    header_space = 6
+    entry_space = 5
+
+    def __init__(self, pagesize=letter, top_margin=36):
+        self.pagesize = pagesize
+        self.top_margin = top_margin
+
+        # SimpleDocTemplate keeps its default one inch left and right margins
+        self.width = pagesize[0] - 2 * inch
+        self.half_columns = [self.width * 0.5, self.width * 0.5]
+        self.wide_columns = [self.width * 0.75, self.width * 0.25]
+
+    def section_spacer(self):
+        return Spacer(1, self.section_space)
+
+    def entry_spacer(self):
+        return Spacer(1, self.entry_space)
+
+    def section_header(self, header_text, style=header_style):
+        return [
+            Paragraph(header_text, style),
+            HRFlowable(width=self.width),
+            Spacer(1, self.header_space),
+        ]
+
+
+@lru_cache(maxsize=None)
+def get_resume_template(pagesize=letter, top_margin=36):
+    return CompiledResumeTemplate(pagesize=pagesize, top_margin=top_margin)
+
+
 # Function to create and style a header with an HRFlowable and Spacer
 def add_header_with_line(doc=None, story=None, header_text=None, style=header_style):
-    story.append(Paragraph(header_text, style))
-    story.append(HRFlowable(width=doc.width))
-    story.append(Spacer(1, 6))
+    story.extend(get_resume_template().section_header(header_text, style))
 
 
 # Function to create a table for company details and job description
 def create_company_table(data, col_widths):
-    return Table(
-        data,
-        colWidths=col_widths,
-        style=TableStyle(
-            [
-                ("VALIGN", (0, 0), (-1, -1), "TOP"),
-                ("ALIGN", (0, 0), (0, -1), "LEFT"),
-                ("ALIGN", (1, 0), (1, -1), "RIGHT"),
-                ("TOPPADDING", (0, 0), (-1, -1), 0),
-                ("BOTTOMPADDING", (0, 0), (-1, -1), 0),
-            ]
-        ),
-    )
+    return Table(data, colWidths=col_widths, style=company_table_style)
 
 
 # Function to create a styled Paragraph with an optional hyperlink
@@ -255,13 +295,13 @@ def add_experiences(doc, story, exp_dict):
             company_table_data = [[company_name, duration], [job_role, location]]
             story.append(
                 create_company_table(
-                    company_table_data, [doc.width * 0.5, doc.width * 0.5]
+                    company_table_data, get_resume_template().half_columns
                 )
             )
 
             # Add job descriptions
             story.append(create_bullet_list(job_description_list, job_desc_style))
-            story.append(Spacer(1, 5))
+            story.append(get_resume_template().entry_spacer())
         else:
             print("There is no experience here")
 
@@ -270,8 +310,7 @@ def add_experiences(doc, story, exp_dict):
 def add_education(doc, story, edu_list):
     add_header_with_line(doc=doc, story=story, header_text="EDUCATION")
 
-    column_width_large = doc.width * 0.75
-    column_width_small = doc.width * 0.25
+    wide_columns = get_resume_template().wide_columns
 
     for edu in edu_list:
         degree_text = get_value(edu, "degree", "No degree")
@@ -287,9 +326,7 @@ def add_education(doc, story, edu_list):
         # Add a education table
         education_table_data = [[institution, end_date], [degree, location]]
         story.append(
-            create_company_table(
-                education_table_data, [column_width_large, column_width_small]
-            )
+            create_company_table(education_table_data, wide_columns)
         )
 
 
@@ -305,8 +342,7 @@ def add_skills(doc=None, story=None, skill_list=None):
 def add_certifications(doc=None, story=None, cert_list=None):
     add_header_with_line(doc=doc, story=story, header_text="CERTIFICATIONS")
 
-    column_width_large = doc.width * 0.75
-    column_width_small = doc.width * 0.25
+    wide_columns = get_resume_template().wide_columns
 
     for cert in cert_list:
         title_text = get_value(cert, "title", "")
@@ -321,9 +357,7 @@ def add_certifications(doc=None, story=None, cert_list=None):
         # Add a education table
         certification_table_data = [[certification_title, date]]
         story.append(
-            create_company_table(
-                certification_table_data, [column_width_large, column_width_small]
-            )
+            create_company_table(certification_table_data, wide_columns)
         )
 
 
@@ -334,36 +368,40 @@ def add_certifications(doc=None, story=None, cert_list=None):
 #         story.append(Paragraph(proj["description"], job_desc_style))
 
 
-def generate_resume_pdf(improved_resume_dict, filename):
+def build_resume_pdf(improved_resume_dict):
+    """Renders the resume dict and returns the PDF bytes."""
     start_time = time.time()
 
     # Define the buffer for the PDF
     pdf_buffer = BytesIO()
 
     # Create a PDF document
-    doc = SimpleDocTemplate(pdf_buffer, pagesize=letter, topMargin=36)
+    template = get_resume_template()
+    doc = SimpleDocTemplate(
+        pdf_buffer, pagesize=template.pagesize, topMargin=template.top_margin
+    )
     story = []
 
     # Add sections to the document
     add_contact_info(story, get_value(improved_resume_dict, "contact", ""))
-    story.append(Spacer(1, 8))  # Add some space before the next section
+    story.append(template.section_spacer())  # Add some space before the next section
     add_summary(
         doc=doc,
         story=story,
         summary_text=get_value(improved_resume_dict, "summary", ""),
     )
-    story.append(Spacer(1, 8))
+    story.append(template.section_spacer())
     add_experiences(doc, story, get_value(improved_resume_dict, "experiences", ""))
-    story.append(Spacer(1, 8))
+    story.append(template.section_spacer())
     add_education(doc, story, get_value(improved_resume_dict, "education", ""))
-    story.append(Spacer(1, 8))
+    story.append(template.section_spacer())
     add_skills(doc, story, get_value(improved_resume_dict, "skills", ""))
-    story.append(Spacer(1, 8))
+    story.append(template.section_spacer())
     add_certifications(
         doc, story, get_value(improved_resume_dict, "certifications", "")
     )
     # Optionally add projects if required
-    # story.append(Spacer(1, 8))
+    # story.append(template.section_spacer())
     # add_projects(story, improved_resume_dict["projects"])
 
     # Build the PDF
@@ -375,6 +413,16 @@ def generate_resume_pdf(improved_resume_dict, filename):
 
     total = time.time() - start_time
     logger.info(f"PDF CREATION TIME: {total}")
+    return pdf_value
+
+
+def generate_resume_pdf(improved_resume_dict, filename):
+    return ContentFile(build_resume_pdf(improved_resume_dict), name=filename)
+
+
+async def agenerate_resume_pdf(improved_resume_dict, filename):
+    """Renders the resume on the render threads without blocking the event loop."""
+    pdf_value = await render_pdf(build_resume_pdf, improved_resume_dict)
     return ContentFile(pdf_value, name=filename)
 
 
@@ -529,7 +577,8 @@ def format_paragraphs(canvas, text_blocks, width, height, y, is_paragraph=True):
     return y
 
 
-async def generate_formatted_pdf(response_text, filename, doc_type=None):
+def build_formatted_pdf(response_text, doc_type=None):
+    """Renders a cover letter dict or plain text and returns the PDF bytes."""
     start_time = time.time()
 
     buffer = BytesIO()
@@ -584,7 +633,12 @@ async def generate_formatted_pdf(response_text, filename, doc_type=None):
 
     total = time.time() - start_time
     logger.info(f"PDF CREATION TIME: {total}")
-    return ContentFile(buffer.getvalue(), name=filename)
+    return buffer.getvalue()
+
+
+async def generate_formatted_pdf(response_text, filename, doc_type=None):
+    pdf_value = await render_pdf(build_formatted_pdf, response_text, doc_type)
+    return ContentFile(pdf_value, name=filename)
 
 
 async def run_main():
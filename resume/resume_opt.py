@@ -1,21 +1,22 @@
 import time
-from uuid import uuid4
+from functools import partial
 
 from asgiref.sync import async_to_sync, sync_to_async
 from celery import shared_task
 from django.conf import settings
 
 from koda.config.logging_config import configure_logger
-from resume.job_post import optimize_job
+from resume.job_post import get_optimized_job_post
 from resume.models import JobPost, OptimizedResumeContent, Resume
-from resume.pdf_gen import generate_resume_pdf
+from resume.pdf_gen import agenerate_resume_pdf
 from resume.utils import (
     Readability,
     customize_doc,
     improve_doc,
     optimize_doc,
     resume_sections_feedback,
-    upload_directly_to_s3,
+    run_feedback_stages,
+    store_pdf_once,
 )
 
 logger = configure_logger(__name__)
@@ -29,17 +30,16 @@ async def improve_resume_func(candidate_id):
     try:
         start_time = time.time()
 
-        # Generate a unique S3 key for the PDF
-        s3_key = f"media/resume/general_improved/{uuid4()}.pdf"
-
         # get from the database, because the default is going to be created using some of the applicant details
         resume_content = ""
 
         readability = Readability(resume_content)
-        readability_feedback = await readability.get_readability_text(doc_type="resume")
-
-        sections_feedback = await resume_sections_feedback(resume_content)
-        feedbacks = [readability_feedback, sections_feedback]
+        feedbacks = await run_feedback_stages(
+            {
+                "readability": readability.get_readability_text(doc_type="resume"),
+                "sections": resume_sections_feedback(resume_content),
+            }
+        )
         resume_feedback = "\n\n".join(feedbacks)
 
         improved_content = await improve_doc(
@@ -48,9 +48,13 @@ async def improve_resume_func(candidate_id):
             doc_feedback=resume_feedback,
         )
 
-        pdf = generate_resume_pdf(improved_content, filename="Improved Resume.pdf")
-        # Upload the PDF directly to S3
-        upload_directly_to_s3(pdf, settings.AWS_STORAGE_BUCKET_NAME, s3_key)
+        # Render and upload only if this exact resume is not stored yet
+        s3_key = await store_pdf_once(
+            partial(agenerate_resume_pdf, filename="Improved Resume.pdf"),
+            improved_content,
+            prefix="media/resume/general_improved",
+            doc_type="resume",
+        )
 
         resume_instance, resume_created = await sync_to_async(
             Resume.objects.update_or_create, thread_sensitive=True
@@ -100,17 +104,14 @@ async def customize_improved_resume_func(candidate_id, custom_instruction):
         custom_instruction=custom_instruction,
     )
 
-    pdf = generate_resume_pdf(
+    # Render and upload only if this exact resume is not stored yet
+    s3_key = await store_pdf_once(
+        partial(agenerate_resume_pdf, filename="Customized Improved Resume.pdf"),
         customized_content,
-        filename="Customized Improved Resume.pdf",
+        prefix="media/resume/general_improved",
+        doc_type="resume",
     )
 
-    # Generate a unique S3 key for the PDF
-    s3_key = f"media/resume/general_improved/{uuid4()}.pdf"
-
-    # Upload the PDF directly to S3
-    upload_directly_to_s3(pdf, settings.AWS_STORAGE_BUCKET_NAME, s3_key)
-
     # Run the synchronous database update_or_create functions concurrently
     resume_instance, resume_created = await resume_update(
         resume_id=candidate_id,
@@ -142,20 +143,8 @@ def customize_improved_resume(applicant_id, custom_instruction):
 
 async def resume_optimize_func(applicant_id, job_post_id):
     resume_instance = await sync_to_async(Resume.objects.get)(resume_id=applicant_id)
-    try:
-        job_post_instance = await sync_to_async(JobPost.objects.get)(
-            job_post_id=job_post_id
-        )
-
-        if job_post_instance.optimized_content:
-            logger.info(
-                f"JobPost {job_post_id} already optimized. Skipping optimization."
-            )
-            optimized_content_for_job_post = job_post_instance.optimized_content
-
-    except JobPost.DoesNotExist:
-        logger.info(f"JobPost {job_post_id} not optimized. Starting optimization.")
-        optimized_content_for_job_post = await optimize_job(job_post_id)
+    job_post_instance = await get_optimized_job_post(job_post_id)
+    optimized_content_for_job_post = job_post_instance.optimized_content
 
     optimized_content = await optimize_doc(
         doc_type="resume",
@@ -163,13 +152,13 @@ async def resume_optimize_func(applicant_id, job_post_id):
         job_description=optimized_content_for_job_post,
     )
 
-    pdf = generate_resume_pdf(optimized_content, filename="Optimized Resume.pdf")
-
-    # Generate a unique S3 key for the PDF
-    s3_key = f"media/resume/optimized/{uuid4()}.pdf"
-
-    # Upload the PDF directly to S3
-    upload_directly_to_s3(pdf, settings.AWS_STORAGE_BUCKET_NAME, s3_key)
+    # Render and upload only if this exact resume is not stored yet
+    s3_key = await store_pdf_once(
+        partial(agenerate_resume_pdf, filename="Optimized Resume.pdf"),
+        optimized_content,
+        prefix="media/resume/optimized",
+        doc_type="resume",
+    )
 
     optimized_content_instance, created = await sync_to_async(
         OptimizedResumeContent.objects.update_or_create, thread_sensitive=True
@@ -215,16 +204,14 @@ async def customize_resume_optimize_func(applicant_id, job_post_id, custom_instr
         custom_instruction=custom_instruction,
     )
 
-    pdf = generate_resume_pdf(
-        customized_content, filename="Customized Optimized Resume.pdf"
+    # Render and upload only if this exact resume is not stored yet
+    s3_key = await store_pdf_once(
+        partial(agenerate_resume_pdf, filename="Customized Optimized Resume.pdf"),
+        customized_content,
+        prefix="media/resume/optimized",
+        doc_type="resume",
     )
 
-    # Generate a unique S3 key for the PDF
-    s3_key = f"media/resume/optimized/{uuid4()}.pdf"
-
-    # Upload the PDF directly to S3
-    upload_directly_to_s3(pdf, settings.AWS_STORAGE_BUCKET_NAME, s3_key)
-
     optimized_content_instance, created = await sync_to_async(
         OptimizedResumeContent.objects.update_or_create, thread_sensitive=True
     )(
@@ -1,3 +1,170 @@
-from django.test import TestCase
+import asyncio
+import importlib
+import io
+import os
+from unittest import mock
 
-# Create your tests here.
+import boto3
+from botocore.exceptions import ClientError
+from channels.layers import channel_layers
+from channels.testing import WebsocketCommunicator
+from django.test import SimpleTestCase, override_settings
+from moto import mock_aws
+
+from koda.config.base_config import get_s3_client
+from resume.consumers import ResumeConsumer
+from resume.utils.util_funcs import s3_object_exists, store_pdf_once
+
+IN_MEMORY_CHANNEL_LAYERS = {
+    "default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}
+}
+
+
+class ConsumerImportTests(SimpleTestCase):
+    def test_resume_consumers_import(self):
+        # Catches consumers importing helpers that no longer exist
+        module = importlib.import_module("resume.consumers")
+        self.assertTrue(hasattr(module, "ResumeConsumer"))
+
+
+@override_settings(CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS)
+class ResumeStreamTests(SimpleTestCase):
+    # Well past the in-memory layer's default channel capacity of 100
+    TOKEN_COUNT = 500
+
+    def setUp(self):
+        channel_layers.backends.clear()
+
+    def tearDown(self):
+        channel_layers.backends.clear()
+
+    async def connect(self):
+        communicator = WebsocketCommunicator(ResumeConsumer.as_asgi(), "/ws/resume/1/")
+        communicator.scope["url_route"] = {"kwargs": {"resume_id": "1"}}
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+        return communicator
+
+    async def test_stream_delivers_every_token(self):
+        tokens = [f"t{i} " for i in range(self.TOKEN_COUNT)]
+
+        async def fake_stream(**kwargs):
+            for token in tokens:
+                yield ("token", token)
+                # Let every token go out as its own frame, like a model stream
+                await asyncio.sleep(0.001)
+            yield ("complete", "".join(tokens))
+
+        communicator = await self.connect()
+        with mock.patch("resume.consumers.stream_optimize_doc", fake_stream):
+            await communicator.send_json_to(
+                {
+                    "type": "creation",
+                    "stream": True,
+                    "resume_content": "resume",
+                    "job_post_content": "job post",
+                }
+            )
+
+            received = []
+            frame = await communicator.receive_json_from(timeout=5)
+            while frame["event"] == "token":
+                received.append(frame["data"])
+                frame = await communicator.receive_json_from(timeout=5)
+
+        self.assertEqual("".join(received), "".join(tokens))
+        self.assertEqual(frame, {"event": "complete", "data": "".join(tokens)})
+        self.assertTrue(await communicator.receive_nothing())
+        await communicator.disconnect()
+
+    async def test_stream_error_reaches_socket(self):
+        async def failing_stream(**kwargs):
+            yield ("token", "partial")
+            raise RuntimeError("model unavailable")
+
+        communicator = await self.connect()
+        with mock.patch("resume.consumers.stream_optimize_doc", failing_stream):
+            await communicator.send_json_to({"type": "creation", "stream": True})
+            first = await communicator.receive_json_from(timeout=5)
+            second = await communicator.receive_json_from(timeout=5)
+
+        self.assertEqual(first, {"event": "token", "data": "partial"})
+        self.assertEqual(second, {"event": "error", "data": "model unavailable"})
+        await communicator.disconnect()
+
+
+@override_settings(AWS_STORAGE_BUCKET_NAME="documents", AWS_S3_ENDPOINT_URL=None)
+class StorePdfOnceTests(SimpleTestCase):
+    def setUp(self):
+        environment = mock.patch.dict(
+            os.environ,
+            {
+                "AWS_ACCESS_KEY_ID": "testing",
+                "AWS_SECRET_ACCESS_KEY": "testing",
+                "AWS_DEFAULT_REGION": "us-east-1",
+            },
+        )
+        environment.start()
+        self.addCleanup(environment.stop)
+
+        aws = mock_aws()
+        aws.start()
+        self.addCleanup(aws.stop)
+
+        get_s3_client.cache_clear()
+        self.addCleanup(get_s3_client.cache_clear)
+        boto3.client("s3").create_bucket(Bucket="documents")
+
+        self.renders = 0
+
+    async def render(self, content):
+        self.renders += 1
+        return io.BytesIO(b"%PDF-1.4 " + content.encode())
+
+    def fail_head_object(self, code):
+        # As S3 answers a missing key without s3:ListBucket, or a server error
+        error = ClientError(
+            {
+                "Error": {"Code": code},
+                "ResponseMetadata": {"HTTPStatusCode": int(code)},
+            },
+            "HeadObject",
+        )
+        patcher = mock.patch.object(get_s3_client(), "head_object", side_effect=error)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_exists_for_stored_object(self):
+        get_s3_client().put_object(Bucket="documents", Key="pdfs/a.pdf", Body=b"pdf")
+        self.assertTrue(s3_object_exists("documents", "pdfs/a.pdf"))
+
+    def test_missing_object(self):
+        self.assertFalse(s3_object_exists("documents", "pdfs/missing.pdf"))
+
+    def test_forbidden_is_treated_as_missing(self):
+        self.fail_head_object("403")
+        self.assertFalse(s3_object_exists("documents", "pdfs/a.pdf"))
+
+    def test_other_errors_are_raised(self):
+        self.fail_head_object("500")
+        with self.assertRaises(ClientError):
+            s3_object_exists("documents", "pdfs/a.pdf")
+
+    async def test_identical_content_is_rendered_once(self):
+        first = await store_pdf_once(self.render, "content", "pdfs", "resume")
+        second = await store_pdf_once(self.render, "content", "pdfs", "resume")
+        other = await store_pdf_once(self.render, "content", "pdfs", "cover letter")
+
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, other)
+        self.assertEqual(self.renders, 2)
+        body = get_s3_client().get_object(Bucket="documents", Key=first)["Body"]
+        self.assertEqual(body.read(), b"%PDF-1.4 content")
+
+    async def test_forbidden_check_still_uploads(self):
+        self.fail_head_object("403")
+        s3_key = await store_pdf_once(self.render, "content", "pdfs", "resume")
+
+        self.assertEqual(self.renders, 1)
+        body = get_s3_client().get_object(Bucket="documents", Key=s3_key)["Body"]
+        self.assertEqual(body.read(), b"%PDF-1.4 content")
@@ -75,6 +75,22 @@ urlpatterns = [
         views.CoverLetterOptimizationCustomizationView.as_view(),
         name="customize_cover_letter_optimization",
     ),  # ~ 50 secs
+    # =====================> Batch URLs <=====================
+    path(
+        "optimize-resumes/<str:job_post_id>/",
+        views.BatchResumeOptimizationView.as_view(),
+        name="batch_resume_optimization",
+    ),
+    path(
+        "optimize-cover-letters/<str:job_post_id>/",
+        views.BatchCoverLetterOptimizationView.as_view(),
+        name="batch_cover_letter_optimization",
+    ),
+    path(
+        "batch-status/<str:batch_id>/",
+        views.BatchOptimizationStatusView.as_view(),
+        name="batch_optimization_status",
+    ),
     # =====================> Job Post URLs <=====================
     path(
         "optimize-job-post/<str:job_id>/",
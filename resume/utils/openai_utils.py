@@ -2,10 +2,9 @@ import json
 import time
 
 from django.conf import settings
-from langchain.chat_models import ChatOpenAI
-from langchain.schema import HumanMessage, SystemMessage
 
-from koda.config.base_config import openai_client as client
+from koda.config.base_config import get_openai_client, get_openai_semaphore
+from koda.config.cache_backends import get_cache, make_cache_key
 from koda.config.logging_config import configure_logger
 from resume.utils.samples import (
     cover_letter_example_structure,
@@ -18,15 +17,9 @@ logger = configure_logger(__name__)
 
 async def get_chat_response(instruction, message, doc_type=None):
     start_time = time.time()
+    llm_cache = get_cache("llm-responses")
 
-    chat = ChatOpenAI(
-        temperature=0.7,
-        model_name=settings.MODEL_NAME,
-        openai_api_key=settings.OPENAI_API_KEY,
-    )
-
-    messages = [SystemMessage(content=instruction), HumanMessage(content=message)]
-
+    structured_instruction = None
     if doc_type:
         if doc_type == "RESUME":
             structured_instruction = f"{instruction}\n\nHere is how I would like the information to be structured in JSON format:\n{resume_example_structure}\n\nIf there isn't any provided value for the required key in the json format, return None as corresponding value.\nInclude line breaks where appropriate in all the sections of the letter. Now, based on the content provided above, please structure the document content accordingly."
@@ -35,25 +28,44 @@ async def get_chat_response(instruction, message, doc_type=None):
         if doc_type == "COVER_LETTER":
             structured_instruction = f"{instruction}\n\nHere is how I would like the information to be structured in JSON format:\n{cover_letter_example_structure}\n\nInclude line breaks where appropriate in all the sections of the letter. Now, based on the content provided above, please structure the document content accordingly."
 
+    cache_key = make_cache_key(
+        settings.MODEL_NAME, instruction, structured_instruction, message
+    )
+    cached_response = await llm_cache.get(cache_key)
+    if cached_response is not None:
+        logger.info(f"Chat Response Cache Hit: {llm_cache.stats()}")
+        return cached_response
+
+    if doc_type:
         messages = [
             {"role": "system", "content": structured_instruction},
             {"role": "user", "content": message},
         ]
 
-        structured_response = await client.chat.completions.create(
-            model=settings.MODEL_NAME,
-            messages=messages,
-            response_format={"type": "json_object"},
-        )
+        async with get_openai_semaphore():
+            structured_response = await get_openai_client().chat.completions.create(
+                model=settings.MODEL_NAME,
+                messages=messages,
+                response_format={"type": "json_object"},
+            )
 
         response = json.loads(structured_response.choices[0].message.content)
+    else:
+        messages = [
+            {"role": "system", "content": instruction},
+            {"role": "user", "content": message},
+        ]
 
-        total = time.time() - start_time
-        logger.info(f"Chat Response Time: {total}")
+        async with get_openai_semaphore():
+            chat_response = await get_openai_client().chat.completions.create(
+                model=settings.MODEL_NAME,
+                messages=messages,
+                temperature=0.7,
+            )
 
-        return response
+        response = chat_response.choices[0].message.content
 
-    response = chat(messages).content
+    await llm_cache.set(cache_key, response)
 
     total = time.time() - start_time
     logger.info(f"Chat Response Time: {total}")
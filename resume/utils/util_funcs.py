@@ -1,16 +1,22 @@
+import asyncio
 import json
 import time
 
-import boto3
 import textstat as textstat_analysis
+from botocore.exceptions import ClientError
 from django.conf import settings
-from langchain.schema import HumanMessage, SystemMessage
-from langchain_openai import ChatOpenAI
 from sklearn.feature_extraction.text import CountVectorizer
 from spellchecker import SpellChecker
 from textblob import TextBlob
 
-from koda.config.base_config import openai_client as client
+from koda.config.base_config import (
+    get_openai_client,
+    get_openai_semaphore,
+    get_s3_client,
+    get_s3_transfer_config,
+    get_s3_upload_executor,
+)
+from koda.config.cache_backends import get_cache, make_cache_key
 from koda.config.logging_config import configure_logger
 
 logger = configure_logger(__name__)
@@ -162,50 +168,189 @@ job_post_keywords_example_structure = json.dumps(
 )
 
 
+def get_structured_instruction(instruction, doc_type):
+    if doc_type == "CL":
+        return f"{instruction}\n\nHere is how I would like the information to be structured in JSON format:\n{cover_letter_example_structure}\n\nInclude line breaks where appropriate in all the sections of the letter. Now, based on the content provided above, please structure the document content accordingly."
+    elif doc_type == "R":
+        return f"{instruction}\n\nHere is how I would like the information to be structured in JSON format:\n{resume_example_structure}\n\nIf there isn't any provided value for the required key in the json format, return None as corresponding value.\nInclude line breaks where appropriate in all the sections of the letter. Now, based on the content provided above, please structure the document content accordingly."
+    elif doc_type == "R-sections-fb":
+        return f"{instruction}\n\nHere is how I would like the information to be structured in JSON format:\n{resume_fb_example_structure}\n\nDo not miss any key value pair when creating the JSON data."
+
+
 async def get_chat_response(instruction, message, doc_type=None):
     start_time = time.time()
+    model_name = "gpt-4o"
+    llm_cache = get_cache("llm-responses")
 
-    chat = ChatOpenAI(
-        temperature=0.7,
-        model_name="gpt-4o",
-        openai_api_key=settings.OPENAI_API_KEY,
-    )
+    structured_instruction = None
+    if doc_type:
+        structured_instruction = get_structured_instruction(instruction, doc_type)
 
-    messages = [SystemMessage(content=instruction), HumanMessage(content=message)]
+    # Identical prompts (e.g. re-running a pipeline on an unchanged resume) are
+    # answered from the cache instead of paying for another model round trip
+    cache_key = make_cache_key(model_name, instruction, structured_instruction, message)
+    cached_response = await llm_cache.get(cache_key)
+    if cached_response is not None:
+        logger.info(f"Chat Response Cache Hit: {llm_cache.stats()}")
+        return cached_response
 
     if doc_type:
-        if doc_type == "CL":
-            structured_instruction = f"{instruction}\n\nHere is how I would like the information to be structured in JSON format:\n{cover_letter_example_structure}\n\nInclude line breaks where appropriate in all the sections of the letter. Now, based on the content provided above, please structure the document content accordingly."
-        elif doc_type == "R":
-            structured_instruction = f"{instruction}\n\nHere is how I would like the information to be structured in JSON format:\n{resume_example_structure}\n\nIf there isn't any provided value for the required key in the json format, return None as corresponding value.\nInclude line breaks where appropriate in all the sections of the letter. Now, based on the content provided above, please structure the document content accordingly."
-        elif doc_type == "R-sections-fb":
-            structured_instruction = f"{instruction}\n\nHere is how I would like the information to be structured in JSON format:\n{resume_fb_example_structure}\n\nDo not miss any key value pair when creating the JSON data."
-
         messages = [
             {"role": "system", "content": structured_instruction},
             {"role": "user", "content": message},
         ]
 
-        structured_response = await client.chat.completions.create(
-            model="gpt-4o",
-            messages=messages,
-            response_format={"type": "json_object"},
-        )
+        async with get_openai_semaphore():
+            structured_response = await get_openai_client().chat.completions.create(
+                model=model_name,
+                messages=messages,
+                response_format={"type": "json_object"},
+            )
 
         response = json.loads(structured_response.choices[0].message.content)
+    else:
+        messages = [
+            {"role": "system", "content": instruction},
+            {"role": "user", "content": message},
+        ]
 
-        total = time.time() - start_time
-        logger.info(f"Chat Response Time: {total}")
+        async with get_openai_semaphore():
+            chat_response = await get_openai_client().chat.completions.create(
+                model=model_name,
+                messages=messages,
+                temperature=0.7,
+            )
 
-        return response
+        response = chat_response.choices[0].message.content
 
-    response = chat(messages).content
+    await llm_cache.set(cache_key, response)
 
     total = time.time() - start_time
     logger.info(f"Chat Response Time: {total}")
     return response
 
 
+class JSONSectionParser:
+    """
+    Incrementally parses a streamed JSON object and returns each top-level
+    key/value pair as soon as its value is complete.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.position = 0
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+        self.section_start = None
+
+    def feed(self, chunk):
+        sections = {}
+        self.text += chunk
+
+        while self.position < len(self.text):
+            char = self.text[self.position]
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == "\\":
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+            elif char == '"':
+                self.in_string = True
+            elif char in "{[":
+                self.depth += 1
+                if self.depth == 1:
+                    self.section_start = self.position + 1
+            elif char in "}]":
+                if self.depth == 1:
+                    self._collect_section(sections)
+                self.depth -= 1
+            elif char == "," and self.depth == 1:
+                self._collect_section(sections)
+                self.section_start = self.position + 1
+            self.position += 1
+
+        return sections
+
+    def _collect_section(self, sections):
+        segment = self.text[self.section_start : self.position].strip()
+        if not segment:
+            return
+        try:
+            sections.update(json.loads("{" + segment + "}"))
+        except json.JSONDecodeError as e:
+            logger.warning(f"Skipping unparsable streamed section: {e}")
+
+
+async def stream_chat_response(instruction, message, doc_type=None):
+    """Streams a chat response as it is generated.
+
+    Yields:
+        tuple: ("token", str) for every text delta, ("section", dict) for every
+        completed top-level JSON section when doc_type is set, and finally
+        ("complete", response) with the same value get_chat_response returns.
+    """
+    start_time = time.time()
+    model_name = "gpt-4o"
+    llm_cache = get_cache("llm-responses")
+
+    structured_instruction = None
+    if doc_type:
+        structured_instruction = get_structured_instruction(instruction, doc_type)
+
+    cache_key = make_cache_key(model_name, instruction, structured_instruction, message)
+    cached_response = await llm_cache.get(cache_key)
+    if cached_response is not None:
+        logger.info(f"Chat Response Cache Hit: {llm_cache.stats()}")
+        if doc_type:
+            yield "section", cached_response
+        else:
+            yield "token", cached_response
+        yield "complete", cached_response
+        return
+
+    request = {
+        "model": model_name,
+        "messages": [
+            {"role": "system", "content": structured_instruction or instruction},
+            {"role": "user", "content": message},
+        ],
+        "stream": True,
+    }
+    if doc_type:
+        request["response_format"] = {"type": "json_object"}
+    else:
+        request["temperature"] = 0.7
+
+    parser = JSONSectionParser()
+    tokens = []
+    async with get_openai_semaphore():
+        stream = await get_openai_client().chat.completions.create(**request)
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            token = chunk.choices[0].delta.content
+            if not token:
+                continue
+            tokens.append(token)
+            yield "token", token
+            if doc_type:
+                sections = parser.feed(token)
+                if sections:
+                    yield "section", sections
+
+    response = "".join(tokens)
+    if doc_type:
+        response = json.loads(response)
+    await llm_cache.set(cache_key, response)
+
+    total = time.time() - start_time
+    logger.info(f"Chat Stream Response Time: {total}")
+    yield "complete", response
+
+
 # =========================== PROP-UP FUNCTIONS ===========================
 class Readability:
     def __init__(self, text):
@@ -356,6 +501,38 @@ async def get_job_post_feedback(doc_text):
     return job_post_feedback
 
 
+async def run_feedback_stages(stages, timeout=None):
+    """Runs independent feedback stages concurrently.
+
+    Args:
+        stages (dict): Stage name mapped to the coroutine producing its feedback.
+        timeout (float, optional): Per-stage timeout in seconds. Defaults to
+            settings.FEEDBACK_STAGE_TIMEOUT.
+
+    Returns:
+        list: Feedback of the stages that finished, in the order given. Stages
+        that fail or time out are logged and left out.
+    """
+    start_time = time.time()
+    timeout = timeout or settings.FEEDBACK_STAGE_TIMEOUT
+
+    results = await asyncio.gather(
+        *(asyncio.wait_for(stage, timeout) for stage in stages.values()),
+        return_exceptions=True,
+    )
+
+    feedbacks = []
+    for stage_name, result in zip(stages, results):
+        if isinstance(result, BaseException):
+            logger.error(f"Feedback stage '{stage_name}' failed: {result!r}")
+            continue
+        feedbacks.append(result)
+
+    total = time.time() - start_time
+    logger.info(f"Feedback Stages Response Time: {total}")
+    return feedbacks
+
+
 async def create_doc(doc_type_1, doc_type_2, doc_content, default_doc):
     start_time = time.time()
 
@@ -504,8 +681,7 @@ async def keyword_analysis1(doc_text_1, doc_text_2):
 #     return matching_keywords, matching_score
 
 
-async def optimize_doc(doc_type, doc_text, job_description):
-    logger.info("----------------------- OPTIMIZATION -----------------------")
+def get_optimize_doc_prompt(doc_type, doc_text, job_description):
     instruction = f"""
         You are a professional recruiter that helps individuals optimize their {doc_type}. \
         Please provide an optimized version of the {doc_type} by tailoring it to fit job post.
@@ -518,6 +694,12 @@ async def optimize_doc(doc_type, doc_text, job_description):
     JOB DESCRIPTION:
     {job_description}
     """
+    return instruction, content
+
+
+async def optimize_doc(doc_type, doc_text, job_description):
+    logger.info("----------------------- OPTIMIZATION -----------------------")
+    instruction, content = get_optimize_doc_prompt(doc_type, doc_text, job_description)
 
     if doc_type == "cover letter":
         optimized_content = await get_chat_response(instruction, content, doc_type="CL")
@@ -531,20 +713,25 @@ async def optimize_doc(doc_type, doc_text, job_description):
     return optimized_content
 
 
+async def stream_optimize_doc(doc_type, doc_text, job_description):
+    """Streaming counterpart of optimize_doc, see stream_chat_response."""
+    logger.info("----------------------- STREAMED OPTIMIZATION -----------------------")
+    instruction, content = get_optimize_doc_prompt(doc_type, doc_text, job_description)
+    structured_doc_type = "CL" if doc_type == "cover letter" else "R"
+
+    async for event in stream_chat_response(
+        instruction, content, doc_type=structured_doc_type
+    ):
+        yield event
+
+
 # =========================== TAILORING FUNCTIONS ===========================
 
 
 # =========================== DATABASE FUNCTIONS ===========================
 def upload_directly_to_s3(file, bucket_name, s3_key):
-    s3 = boto3.client(
-        "s3",
-        aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-        aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-        # region_name='your-region',  # Uncomment and set your region if necessary
-    )
-
     # Include ExtraArgs to set content type and content disposition
-    s3.upload_fileobj(
+    get_s3_client().upload_fileobj(
         file,
         bucket_name,
         s3_key,
@@ -552,7 +739,76 @@ def upload_directly_to_s3(file, bucket_name, s3_key):
             "ContentType": "application/pdf",
             "ContentDisposition": "inline",
         },
+        Config=get_s3_transfer_config(),
+    )
+
+
+async def aupload_directly_to_s3(file, bucket_name, s3_key):
+    """Uploads on the bounded S3 executor so the event loop is never blocked."""
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(
+        get_s3_upload_executor(), upload_directly_to_s3, file, bucket_name, s3_key
+    )
+
+
+def get_content_s3_key(prefix, content, doc_type):
+    """
+    Keys a PDF by its canonicalized content and the template version, so an
+    identical document always maps to the same S3 object.
+    """
+    digest = make_cache_key(settings.PDF_TEMPLATE_VERSION, doc_type, content)
+    return f"{prefix}/{digest}.pdf"
+
+
+def s3_object_exists(bucket_name, s3_key):
+    """
+    Checks for `s3_key` with head_object. Without s3:ListBucket on the bucket,
+    S3 answers 403 rather than 404 for a missing key, so a 403 is treated as
+    not stored and the caller uploads, which only needs s3:PutObject.
+    """
+    try:
+        get_s3_client().head_object(Bucket=bucket_name, Key=s3_key)
+        return True
+    except ClientError as e:
+        code = e.response["Error"]["Code"]
+        if code in ("404", "NoSuchKey", "NotFound"):
+            return False
+        if code in ("403", "AccessDenied", "Forbidden"):
+            logger.warning(
+                f"No permission to check for {s3_key} (grant s3:ListBucket to "
+                "reuse stored PDFs), uploading it again"
+            )
+            return False
+        raise
+
+
+async def store_pdf_once(render, content, prefix, doc_type):
+    """Renders and uploads a document PDF unless the same content is stored.
+
+    Args:
+        render (callable): Coroutine function taking the content and returning
+            the rendered PDF file.
+        content (dict | str): The document content the PDF is rendered from.
+        prefix (str): S3 folder the PDF is stored under.
+        doc_type (str): 'resume' or 'cover letter'.
+
+    Returns:
+        str: The content-addressed S3 key of the PDF.
+    """
+    bucket_name = settings.AWS_STORAGE_BUCKET_NAME
+    s3_key = get_content_s3_key(prefix, content, doc_type)
+
+    loop = asyncio.get_running_loop()
+    exists = await loop.run_in_executor(
+        get_s3_upload_executor(), s3_object_exists, bucket_name, s3_key
     )
+    if exists:
+        logger.info(f"Reusing stored PDF {s3_key}")
+        return s3_key
+
+    pdf = await render(content)
+    await aupload_directly_to_s3(pdf, bucket_name, s3_key)
+    return s3_key
 
 
 def get_full_url(s3_key):
@@ -1,12 +1,13 @@
 import json
 
-import boto3
 from django.conf import settings
 from django.http import JsonResponse
 from django.shortcuts import get_object_or_404
 from django.views import View
 from rest_framework import status
 
+from koda.config.base_config import get_s3_client
+from resume.batch_opt import get_batch_progress, schedule_batch_optimization
 from resume.cl_opt import (
     customize_improved_cover_letter,
     customize_optimized_cover_letter,
@@ -320,6 +321,67 @@ class CoverLetterOptimizationCustomizationView(View):
 # ============================> COVER LETTER <============================
 
 
+# ============================> BATCH <============================
+class BatchOptimizationView(View):
+    """
+    Tailors one document type for a list of applicants against a single job post.
+    The job post is optimized once and shared by every applicant in the batch.
+    """
+
+    serializer_class = None
+    doc_type = None
+    success_message = None
+
+    async def post(self, request, job_post_id, format=None):
+        try:
+            # Parse JSON data from the request body
+            body_unicode = request.body.decode("utf-8")
+            body_data = json.loads(body_unicode)
+
+            applicant_ids = body_data.get("applicant_ids")
+            if not isinstance(applicant_ids, list) or not applicant_ids:
+                return JsonResponse(
+                    {"error": "applicant_ids must be a non-empty list"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+
+            batch_id = schedule_batch_optimization(
+                self.doc_type, job_post_id, applicant_ids
+            )
+            data = {
+                "success": self.success_message,
+                "batch_id": batch_id,
+            }
+            return JsonResponse(data)
+        except Exception as e:
+            return JsonResponse({"error": str(e)}, status=500)
+
+
+class BatchResumeOptimizationView(BatchOptimizationView):
+    doc_type = "resume"
+    success_message = "Batch Resume Optimization Initiated"
+
+
+class BatchCoverLetterOptimizationView(BatchOptimizationView):
+    doc_type = "cover letter"
+    success_message = "Batch Cover Letter Optimization Initiated"
+
+
+class BatchOptimizationStatusView(View):
+    """
+    Returns per-applicant progress for a batch started by a BatchOptimizationView
+    """
+
+    def get(self, request, batch_id):
+        progress = get_batch_progress(batch_id)
+        if progress is None:
+            return JsonResponse({"error": "Batch not found"}, status=404)
+        return JsonResponse(progress)
+
+
+# ============================> BATCH <============================
+
+
 # ============================> JOB POST <============================
 class JobOptimizationView(View):
     """
@@ -355,12 +417,8 @@ class Boto3UploadView(View):
         # The path to your file within your project directory
         file_path = "resume123.pdf"  # Replace with your file's path
 
-        # Create an S3 client
-        s3 = boto3.client(
-            "s3",
-            aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-            aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-        )
+        # Reuse the pooled S3 client
+        s3 = get_s3_client()
 
         # Define the bucket name and the key for the file in S3
         bucket_name = settings.AWS_STORAGE_BUCKET_NAME
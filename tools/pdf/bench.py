@@ -0,0 +1,98 @@
+"""
+Times grid extraction on synthetic dense statement pages, comparing the span
+index against the linear scan it replaced.
+
+    python -m tools.pdf.bench --rows 500 --pages 5
+"""
+
+import argparse
+import random
+import time
+
+from tools.pdf.data_extractor import DataExtractor
+
+# Column name, left edge and width in points
+COLUMNS = [
+    ("Date", 40, 60),
+    ("Description", 110, 240),
+    ("Debit", 360, 50),
+    ("Credit", 420, 50),
+    ("Balance", 480, 60),
+]
+ROW_HEIGHT = 9.5
+
+
+def build_page(rows, seed):
+    """Spans and grid of one page with `rows` transactions plus some noise."""
+    rng = random.Random(seed)
+    text_blocks = []
+    grid = []
+    for row in range(rows):
+        top = 60 + row * ROW_HEIGHT
+        bottom = top + ROW_HEIGHT - 1.5
+        grid_row = []
+        for name, left, width in COLUMNS:
+            text = f"{name[:3]}-{row}-{rng.randint(0, 9999)}"
+            jitter = rng.uniform(-0.4, 0.4)
+            span_bbox = (left, top + jitter, left + width, bottom + jitter)
+            cell_bbox = (left - 2, top, left + width + 2, bottom)
+            text_blocks.append({"text": text, "bbox": span_bbox})
+            grid_row.append({"name": name, "bbox": cell_bbox})
+        grid.append(grid_row)
+
+    # Headers, footers and a tall margin note, in extraction order
+    footer_top = 60 + rows * ROW_HEIGHT
+    text_blocks.insert(0, {"text": "Statement of account", "bbox": (40, 10, 300, 30)})
+    text_blocks.append(
+        {"text": "Page footer", "bbox": (40, footer_top, 200, footer_top + 10)}
+    )
+    text_blocks.append({"text": "Margin note", "bbox": (560, 100, 580, 400)})
+    for index, block in enumerate(text_blocks):
+        block["index"] = index
+    return text_blocks, grid
+
+
+def extract_linear(text_blocks, grid):
+    return [
+        [DataExtractor.find_text_in_bbox(text_blocks, cell["bbox"]) for cell in row]
+        for row in grid
+    ]
+
+
+def time_call(func, *args, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=500)
+    parser.add_argument("--pages", type=int, default=5)
+    args = parser.parse_args()
+
+    pages = [build_page(args.rows, seed) for seed in range(args.pages)]
+    spans = sum(len(text_blocks) for text_blocks, _ in pages)
+    cells = sum(len(row) for _, grid in pages for row in grid)
+    print(f"{args.pages} pages, {spans} spans, {cells} cells")
+
+    linear_total = indexed_total = 0.0
+    for text_blocks, grid in pages:
+        linear_time, expected = time_call(extract_linear, text_blocks, grid)
+        indexed_time, result = time_call(
+            DataExtractor.extract_data_using_grid, text_blocks, grid
+        )
+        assert result == expected, "indexed extraction differs from the linear scan"
+        linear_total += linear_time
+        indexed_total += indexed_time
+
+    print(f"Linear scan: {linear_total * 1000:.1f} ms")
+    print(f"Span index:  {indexed_total * 1000:.1f} ms")
+    print(f"Speedup:     {linear_total / indexed_total:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,63 @@
+import numpy as np
+
+
+class SpanIndex:
+    """
+    Text spans of one page sorted by their top edge. A lookup binary-searches
+    the spans that can reach the queried rows and runs the overlap test on that
+    slice only, vectorized, instead of scanning the whole page per cell.
+    """
+
+    def __init__(self, text_blocks):
+        self.texts = [block["text"] for block in text_blocks]
+        boxes = np.asarray(
+            [block["bbox"] for block in text_blocks], dtype=np.float64
+        ).reshape(-1, 4)
+        self.order = np.argsort(boxes[:, 1], kind="stable")
+        self.boxes = boxes[self.order]
+        self.tops = self.boxes[:, 1]
+        # A span can only reach down to its top plus the tallest span height.
+        # One point of slack covers float rounding, the overlap test is exact.
+        heights = self.boxes[:, 3] - self.boxes[:, 1]
+        self.reach = float(heights.max()) + 1 if len(heights) else 0.0
+
+    def find_texts(self, bboxes):
+        """Returns the joined text of the spans overlapping each of `bboxes`.
+
+        The bboxes are looked up together, typically one grid row, so the
+        candidate slice is searched for once.
+        """
+        if not self.texts or not len(bboxes):
+            return ["" for _ in bboxes]
+
+        cells = np.asarray(bboxes, dtype=np.float64).reshape(-1, 4)
+        start = np.searchsorted(self.tops, cells[:, 1].min() - self.reach, "left")
+        end = np.searchsorted(self.tops, cells[:, 3].max(), "right")
+        boxes = self.boxes[start:end]
+        positions = self.order[start:end]
+
+        texts = []
+        for cell_left, cell_top, cell_right, cell_bottom in cells:
+            # Same test as DataExtractor.block_overlaps_bbox
+            overlaps = ~(
+                (boxes[:, 2] < cell_left)
+                | (boxes[:, 0] > cell_right)
+                | (boxes[:, 3] < cell_top)
+                | (boxes[:, 1] > cell_bottom)
+            )
+            # Joined in page order, as a linear scan would
+            hits = np.sort(positions[overlaps])
+            texts.append(" ".join(self.texts[i] for i in hits).strip())
+        return texts
+
+
 class DataExtractor:
     """Extracts data using the defined grid."""
 
     @staticmethod
     def extract_data_using_grid(text_blocks, grid):
-        extracted_data = []
-        for row in grid:
-            row_data = []
-            for cell in row:
-                cell_text = DataExtractor.find_text_in_bbox(text_blocks, cell["bbox"])
-                row_data.append(cell_text)
-            extracted_data.append(row_data)
-        return extracted_data
+        index = SpanIndex(text_blocks)
+        return [index.find_texts([cell["bbox"] for cell in row]) for row in grid]
 
     @staticmethod
     def find_text_in_bbox(text_blocks, bbox):
@@ -1,4 +1,62 @@
-from dateutil.parser import parse
+import re
+from datetime import datetime
+from functools import lru_cache
+
+from dateutil.parser import parse, parserinfo
+
+# dateutil only finds a date in digit-free text through month or weekday names,
+# anything else without a digit can be rejected without parsing
+_DATE_NAMES = sorted(
+    {
+        name.lower()
+        for names in parserinfo.MONTHS + parserinfo.WEEKDAYS
+        for name in names
+    },
+    key=len,
+    reverse=True,
+)
+DATE_NAME_PATTERN = re.compile(
+    r"(?<![a-z])(?:%s)(?![a-z])" % "|".join(_DATE_NAMES), re.IGNORECASE
+)
+DIGIT_PATTERN = re.compile(r"\d")
+
+# Common bank statement formats, confirmed with strptime. A shape that matches
+# but does not parse, such as 29-Feb without a year, is left to dateutil.
+DATE_FORMATS = [
+    (re.compile(r"\d{1,2}-[A-Za-z]{3}-\d{4}"), "%d-%b-%Y"),  # 01-Sep-2022
+    (re.compile(r"\d{1,2}-[A-Za-z]{3}-\d{2}"), "%d-%b-%y"),  # 01-Sep-22
+    (re.compile(r"\d{1,2} [A-Za-z]{3} \d{4}"), "%d %b %Y"),  # 01 Sep 2022
+    (re.compile(r"\d{1,2}-[A-Za-z]{3}"), "%d-%b"),  # 27-Oct
+    (re.compile(r"\d{1,2} [A-Za-z]{3}"), "%d %b"),  # 4 Jul
+    (re.compile(r"[A-Za-z]{3} \d{1,2}, \d{4}"), "%b %d, %Y"),  # Sep 01, 2022
+    (re.compile(r"\d{1,2}/\d{1,2}/\d{4}"), "%d/%m/%Y"),  # 01/09/2022
+    (re.compile(r"\d{1,2}/\d{1,2}/\d{2}"), "%d/%m/%y"),  # 01/09/22
+    (re.compile(r"\d{1,2}-\d{1,2}-\d{4}"), "%d-%m-%Y"),  # 01-09-2022
+    (re.compile(r"\d{1,2}\.\d{1,2}\.\d{4}"), "%d.%m.%Y"),  # 01.09.2022
+    (re.compile(r"\d{4}-\d{2}-\d{2}"), "%Y-%m-%d"),  # 2022-09-01
+]
+
+
+@lru_cache(maxsize=8192)
+def _is_valid_date(string):
+    text = string.strip()
+    if not DIGIT_PATTERN.search(text) and not DATE_NAME_PATTERN.search(text):
+        return False
+
+    for pattern, date_format in DATE_FORMATS:
+        if pattern.fullmatch(text):
+            try:
+                datetime.strptime(text, date_format)
+                return True
+            except ValueError:
+                break
+
+    # Anything else gets the original fuzzy parse, whose answer is memoized
+    try:
+        parse(string, fuzzy=True)
+        return True
+    except (ValueError, OverflowError):
+        return False
 
 
 class DateValidator:
@@ -6,8 +64,11 @@ class DateValidator:
 
     @staticmethod
     def is_valid_date(string):
-        try:
-            parse(string, fuzzy=True)
-            return True
-        except ValueError:
+        if not isinstance(string, str):
             return False
+        return _is_valid_date(string)
+
+    @staticmethod
+    def valid_dates(strings):
+        """Returns is_valid_date for each of `strings`, e.g. a page of spans."""
+        return [DateValidator.is_valid_date(string) for string in strings]
@@ -8,9 +8,12 @@ class GridDefiner:
     def find_stride_and_first_last_date_indices(
         data, start_index_for_searching, stride_step=None
     ):
+        # Every span of the page is classified in one pass
+        is_date = DateValidator.valid_dates([block["text"] for block in data])
+
         first_date_index = None
         for i in range(start_index_for_searching, len(data)):
-            if DateValidator.is_valid_date(data[i]["text"]):
+            if is_date[i]:
                 first_date_index = i
                 break
 
@@ -20,7 +23,7 @@ class GridDefiner:
         # the stride should be used from the openai vision response
         stride = None
         for i in range(first_date_index + 1, len(data)):
-            if DateValidator.is_valid_date(data[i]["text"]):
+            if is_date[i]:
                 stride = i - first_date_index
                 break
 
@@ -29,7 +32,7 @@ class GridDefiner:
 
         last_date_index = first_date_index
         for i in range(first_date_index, len(data), stride):
-            if DateValidator.is_valid_date(data[i]["text"]):
+            if is_date[i]:
                 last_date_index = i
             else:
                 break
@@ -0,0 +1,153 @@
+import threading
+
+import fitz  # PyMuPDF
+import requests
+from PIL import Image
+
+RASTER_DPI = 200  # pdf2image's default, which the vision prompts were tuned on
+
+
+class ParsedPDF:
+    """
+    One downloaded statement shared by every extraction step. The PyMuPDF handle,
+    the text spans, the tables and each page raster are built on first use and
+    kept, so a statement is downloaded once and every page is parsed or
+    rasterized at most once.
+    """
+
+    def __init__(self, pdf_data):
+        self.pdf_data = pdf_data
+        self._document = None
+        self._spans = None
+        self._tables = None
+        self._rasters = {}
+        # PyMuPDF documents are not thread-safe
+        self._lock = threading.RLock()
+
+    @classmethod
+    def from_url(cls, pdf_url):
+        response = requests.get(pdf_url)
+        response.raise_for_status()  # Raises an HTTPError if the response was an error
+        return cls(response.content)
+
+    @property
+    def document(self):
+        with self._lock:
+            if self._document is None:
+                self._document = fitz.open(stream=self.pdf_data, filetype="pdf")
+            return self._document
+
+    @property
+    def page_count(self):
+        return self.document.page_count
+
+    def get_spans(self):
+        """Text spans of every page as {"page", "data": [{"index", "text", "bbox"}]}."""
+        with self._lock:
+            if self._spans is None:
+                self._spans = [
+                    {"page": page_num, "data": extract_page_spans(page)}
+                    for page_num, page in enumerate(self.document)
+                ]
+            return self._spans
+
+    def get_tables(self):
+        with self._lock:
+            if self._tables is None:
+                self._tables = [
+                    {"page": page_num, "bbox": table.bbox, "data": table.extract()}
+                    for page_num, page in enumerate(self.document)
+                    for table in page.find_tables()
+                ]
+            return self._tables
+
+    def rasterize(
+        self,
+        first_page=0,
+        last_page=None,
+        dpi=RASTER_DPI,
+        grayscale=False,
+        target_size=None,
+    ):
+        """
+        Renders pages `first_page` to `last_page` (0-based, inclusive) as PIL
+        images, each rendered once per set of options.
+
+        Args:
+            first_page (int): First page to render.
+            last_page (int): Last page to render, defaults to the last page.
+            dpi (int): Render resolution.
+            grayscale (bool): Render a single-channel image.
+            target_size (tuple): (width, height) the page is fitted into. The
+                page is rendered at that size directly rather than at `dpi` and
+                resized, and never scaled above `dpi`.
+
+        Returns:
+            list: PIL images in page order.
+        """
+        if last_page is None:
+            last_page = self.page_count - 1
+        last_page = min(last_page, self.page_count - 1)
+        return [
+            self._render_page(page_num, dpi, grayscale, target_size)
+            for page_num in range(first_page, last_page + 1)
+        ]
+
+    def _render_page(self, page_num, dpi, grayscale, target_size):
+        key = (page_num, dpi, grayscale, target_size)
+        with self._lock:
+            if key not in self._rasters:
+                page = self.document[page_num]
+                zoom = dpi / 72
+                if target_size:
+                    width, height = target_size
+                    zoom = min(zoom, width / page.rect.width, height / page.rect.height)
+                pixmap = page.get_pixmap(
+                    matrix=fitz.Matrix(zoom, zoom),
+                    colorspace=fitz.csGRAY if grayscale else fitz.csRGB,
+                    alpha=False,
+                )
+                self._rasters[key] = Image.frombytes(
+                    "L" if grayscale else "RGB",
+                    (pixmap.width, pixmap.height),
+                    pixmap.samples,
+                )
+            return self._rasters[key]
+
+    def get_page_image(self, page_num, **options):
+        """Returns page `page_num` (0-based) as a PIL image."""
+        return self.rasterize(page_num, page_num, **options)[0]
+
+    def get_page_images(self, **options):
+        return self.rasterize(**options)
+
+    def close(self):
+        with self._lock:
+            if self._document is not None:
+                self._document.close()
+                self._document = None
+            self._rasters.clear()
+
+    def __getstate__(self):
+        # Only the bytes and the plain-data results travel to Celery workers,
+        # the handle and the rasters are rebuilt there on demand
+        return {"pdf_data": self.pdf_data, "spans": self._spans, "tables": self._tables}
+
+    def __setstate__(self, state):
+        self.__init__(state["pdf_data"])
+        self._spans = state["spans"]
+        self._tables = state["tables"]
+
+
+def extract_page_spans(page):
+    page_data = []
+    for block in page.get_text("dict")["blocks"]:
+        for line in block.get("lines", []):
+            for span in line["spans"]:
+                span_data = {
+                    "index": len(page_data),
+                    "text": span["text"],
+                    "bbox": span["bbox"],
+                }
+                page_data.append(span_data)
+    return page_data
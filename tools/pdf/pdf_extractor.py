@@ -1,11 +1,13 @@
 import base64
 import json
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from io import BytesIO
 
-import fitz  # PyMuPDF
-import requests
+from django.conf import settings
 from fuzzywuzzy import process
-from pdf2image import convert_from_bytes, convert_from_path
 
 from verification.pdf.openai_chat import (
     categorize_pdf,
@@ -14,15 +16,14 @@ from verification.pdf.openai_chat import (
     get_vision_response,
     refine_data,
 )
+from verification.pdf.parsed_pdf import ParsedPDF
 
-
-def pdf_url_to_images(pdf_url):
-    response = requests.get(pdf_url)
-    if response.status_code == 200:
-        images = convert_from_bytes(response.content)
-        return images  # This is a list of PIL.Image objects
-    else:
-        raise Exception("Failed to download PDF")
+# Render options per use. Categorization only needs the page layout, reading
+# headers and transactions needs the text legible. Vision models downscale
+# anything above 2048px anyway, so larger images only cost upload time.
+CATEGORY_RASTER = {"dpi": 100, "grayscale": True, "target_size": (1024, 1024)}
+PAGE_RASTER = {"grayscale": True, "target_size": (1536, 2048)}
+VISION_JPEG_QUALITY = 80
 
 
 class PDFExtractor:
@@ -30,86 +31,48 @@ class PDFExtractor:
 
     def __init__(self, pdf_url):
         self.pdf_url = pdf_url
-        self.pdf_data = self.download_pdf()
+        # Downloaded once, every step below reads from the same parsed document
+        self.document = ParsedPDF.from_url(pdf_url)
 
-    def download_pdf(self):
-        """Downloads PDF from the URL and returns a bytes object."""
-        response = requests.get(self.pdf_url)
-        response.raise_for_status()  # Raises an HTTPError if the response was an error
-        return response.content
+    @property
+    def pdf_data(self):
+        return self.document.pdf_data
 
     def extract_text_blocks_with_bboxes(self):
-        doc = fitz.open(stream=self.pdf_data, filetype="pdf")
-        all_pages_data = []
-
-        for page_num, page in enumerate(doc):
-            page_data = []
-            page_index = 0
-
-            text_dict = page.get_text("dict")
-            blocks = text_dict["blocks"]
-
-            for block in blocks:
-                if "lines" in block:
-                    for line in block["lines"]:
-                        for span in line["spans"]:
-                            span_data = {
-                                "index": page_index,
-                                "text": span["text"],
-                                "bbox": span["bbox"],
-                            }
-                            page_data.append(span_data)
-                            page_index += 1
-
-            all_pages_data.append({"page": page_num, "data": page_data})
-
-        doc.close()
-        return all_pages_data
+        return self.document.get_spans()
 
     def extract_tables(self):
-        doc = fitz.open(stream=self.pdf_data, filetype="pdf")
-        all_tables_data = []
-
-        for page_num, page in enumerate(doc):
-            # Find tables on the page
-            tables = page.find_tables()
-
-            # Iterate through found tables and extract their data
-            for table in tables:
-                # Extract table data
-                table_data = table.extract()  # Use the extract method to get table data
-                all_tables_data.append(
-                    {
-                        "page": page_num,
-                        "bbox": table.bbox,  # Directly access the bbox attribute of the table
-                        "data": table_data,
-                    }
-                )
+        return self.document.get_tables()
 
-        doc.close()
-        return all_tables_data
+    def encode_image_to_base64(self, image, max_size=None, quality=VISION_JPEG_QUALITY):
+        """Encode PIL image to base64 without saving to disk.
 
-    def encode_image_to_base64(self, image):
-        """Encode PIL image to base64 without saving to disk."""
+        Images larger than `max_size` are downscaled first and the JPEG is
+        recompressed at `quality`, keeping vision requests small.
+        """
+        if max_size and (image.width > max_size[0] or image.height > max_size[1]):
+            image = image.copy()
+            image.thumbnail(max_size)
         img_byte_arr = BytesIO()
-        image.save(img_byte_arr, format="JPEG")
+        image.save(img_byte_arr, format="JPEG", quality=quality, optimize=True)
         return base64.b64encode(img_byte_arr.getvalue()).decode("utf-8")
 
+    def get_image_data_url(self, image, max_size=None):
+        encoded_image = self.encode_image_to_base64(image, max_size=max_size)
+        return f"data:image/jpeg;base64,{encoded_image}"
+
     def get_headers(self):
         """Get headers from the first page of the PDF by sending it to an API."""
 
         desired_columns = {"columns": ["Date", "Description", "Credit", "Debit"]}
 
-        # Convert PDF to list of images
-        # images = convert_from_path(self.pdf_path, first_page=0, last_page=1)
-        images = pdf_url_to_images(self.pdf_url)
-        images = True
+        # Headers are read from the first page, shared with vision_pdf's raster
+        images = self.document.rasterize(first_page=0, last_page=0, **PAGE_RASTER)
 
         if images:
-            # first_image = images[0]
-            # encoded_image = self.encode_image_to_base64(first_image)
-            # image_data_url = f"data:image/jpeg;base64,{encoded_image}"
-            image_data_url = self.pdf_url
+            image_data_url = self.get_image_data_url(
+                images[0], max_size=PAGE_RASTER["target_size"]
+            )
             vision_columns = get_vision_response(image_data_url, desired_columns)
 
             instruction = f"""Given two lists of column names for a transactions table, return a list of which columns in the second list correspond to the columns in \
@@ -174,42 +137,60 @@ class PDFExtractor:
             ],
         }
 
-        # # Convert PDF to list of images
-        # images = convert_from_path(self.pdf_path)
-        images = pdf_url_to_images(self.pdf_url)
+        # Rendered up front, the document handle is not shared across threads
+        images = self.document.get_page_images(**PAGE_RASTER)
+        if not images:
+            return []
 
-        data = []
-        if images:
-            vision_data = None
-            for image in images:
-                success = False
-                while not success:
-                    try:
-                        encoded_image = self.encode_image_to_base64(image)
-                        image_data_url = f"data:image/jpeg;base64,{encoded_image}"
-
-                        vision_data = get_vision_data(
-                            image_data_url, vision_data_sample_columns
-                        )
-                        success = True  # If get_vision_data succeeds, set success to True to exit the loop
-
-                        refined_data = refine_data(
-                            vision_data, vision_data_sample_columns
-                        )
-                        data.append(refined_data)
-                    except Exception as e:
-                        print(f"Error processing image: {e}. Retrying...")
-        return data
+        # Pages are independent requests, so they run concurrently. map keeps
+        # the results in page order and raises the first page that gave up.
+        executor = ThreadPoolExecutor(
+            max_workers=min(settings.PDF_VISION_MAX_CONCURRENCY, len(images)),
+            thread_name_prefix="pdf-vision",
+        )
+        try:
+            extract_page = partial(
+                self.extract_page_with_vision,
+                sample_columns=vision_data_sample_columns,
+            )
+            return list(executor.map(extract_page, range(len(images)), images))
+        finally:
+            executor.shutdown(cancel_futures=True)
+
+    def extract_page_with_vision(self, page_num, image, sample_columns):
+        """Reads the transactions of one page, retrying with backoff.
+
+        Raises the last error once PDF_VISION_MAX_ATTEMPTS attempts failed.
+        """
+        image_data_url = self.get_image_data_url(
+            image, max_size=PAGE_RASTER["target_size"]
+        )
+        max_attempts = settings.PDF_VISION_MAX_ATTEMPTS
+        for attempt in range(1, max_attempts + 1):
+            try:
+                vision_data = get_vision_data(image_data_url, sample_columns)
+                return refine_data(vision_data, sample_columns)
+            except Exception as e:
+                if attempt == max_attempts:
+                    print(f"Giving up on page {page_num + 1}: {e}")
+                    raise
+                # Full jitter keeps retried pages from hitting the API together
+                delay = min(
+                    settings.PDF_VISION_RETRY_MAX_DELAY,
+                    settings.PDF_VISION_RETRY_BASE_DELAY * 2 ** (attempt - 1),
+                )
+                print(f"Error processing page {page_num + 1}: {e}. Retrying...")
+                time.sleep(random.uniform(0, delay))
 
     def get_pdf_category(self):
-        # Convert PDF to list of images
-        # images = convert_from_path(self.pdf_path, first_page=0, last_page=1)
-        images = pdf_url_to_images(self.pdf_url)
+        # Only the first page is needed, rendered small and in grayscale
+        images = self.document.rasterize(first_page=0, last_page=0, **CATEGORY_RASTER)
 
         if images:
             first_image = images[0]
-            encoded_image = self.encode_image_to_base64(first_image)
-            image_data_url = f"data:image/jpeg;base64,{encoded_image}"
+            image_data_url = self.get_image_data_url(
+                first_image, max_size=CATEGORY_RASTER["target_size"]
+            )
 
             sample_columns = {"type": 1}
             pdf_type = categorize_pdf(image_data_url, sample_columns)
@@ -101,10 +101,12 @@ class PDFDataManager:
                 # If no header, start from the first row
                 data_start_index = 0
 
-            for row in table["data"][data_start_index:]:
-                if len(row) == len(self.header_columns) and DateValidator.is_valid_date(
-                    row[0]
-                ):
+            rows = table["data"][data_start_index:]
+            starts_with_date = DateValidator.valid_dates(
+                row[0] if row else None for row in rows
+            )
+            for row, is_dated in zip(rows, starts_with_date):
+                if len(row) == len(self.header_columns) and is_dated:
                     new_table.append(row)
                 elif header_index is not None:
                     # If a header was found but this row doesn't meet criteria, stop processing
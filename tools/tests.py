@@ -0,0 +1,133 @@
+from dateutil.parser import parse
+from django.test import SimpleTestCase
+
+from tools.pdf.bench import build_page, extract_linear
+from tools.pdf.data_extractor import DataExtractor, SpanIndex
+from tools.pdf.date_utils import DateValidator, _is_valid_date
+
+# Statement cells covering every DATE_FORMATS shape, shapes strptime rejects,
+# month and weekday names, and the amounts and labels around them
+STATEMENT_CELLS = [
+    "01-Sep-2022",
+    "01-Sep-22",
+    "01 Sep 2022",
+    "27-Oct",
+    "4 Jul",
+    "Sep 01, 2022",
+    "01/09/2022",
+    "12/31/2022",
+    "01/09/22",
+    "01-09-2022",
+    "01.09.2022",
+    "2022-09-01",
+    "29-Feb",
+    "29-Feb-2023",
+    "31/02/2022",
+    "13/13/2022",
+    "June 5th",
+    "Sept",
+    "may",
+    "Monday payment",
+    "Balance brought forward 01 Sep",
+    "Decathlon",
+    "Mayfair",
+    "Opening balance",
+    "Total",
+    "the end",
+    "AM",
+    "1,234.56",
+    "12.50",
+    "31",
+    "2022",
+    "Page 1 of 3",
+    "TRANSFER TO 12345",
+    "REF 99999999999",
+    "99999999999999999999",
+    "",
+    "   ",
+]
+
+
+def dateutil_finds_date(string):
+    # The check DateValidator replaced
+    try:
+        parse(string, fuzzy=True)
+        return True
+    except (ValueError, OverflowError):
+        return False
+
+
+def span(index, text, bbox):
+    return {"index": index, "text": text, "bbox": bbox}
+
+
+class SpanIndexTests(SimpleTestCase):
+    def test_joins_overlapping_spans_in_page_order(self):
+        # Extraction order differs from top-to-bottom order
+        index = SpanIndex(
+            [
+                span(0, "second", (10, 20, 50, 28)),
+                span(1, "first", (60, 18, 90, 26)),
+                span(2, "elsewhere", (10, 100, 50, 108)),
+            ]
+        )
+        self.assertEqual(index.find_texts([(0, 15, 100, 30)]), ["second first"])
+
+    def test_touching_edges_overlap(self):
+        index = SpanIndex([span(0, "edge", (10, 10, 20, 20))])
+        self.assertEqual(
+            index.find_texts([(20, 20, 30, 30), (20.01, 0, 30, 30)]), ["edge", ""]
+        )
+
+    def test_tall_span_starting_above_the_row_is_found(self):
+        index = SpanIndex(
+            [
+                span(0, "row", (10, 200, 50, 208)),
+                span(1, "margin note", (300, 0, 320, 400)),
+            ]
+        )
+        self.assertEqual(index.find_texts([(290, 200, 330, 208)]), ["margin note"])
+
+    def test_empty_page_and_empty_row(self):
+        self.assertEqual(SpanIndex([]).find_texts([(0, 0, 10, 10)]), [""])
+        self.assertEqual(SpanIndex([span(0, "x", (0, 0, 1, 1))]).find_texts([]), [])
+
+    def test_matches_the_linear_scan(self):
+        for seed in range(3):
+            text_blocks, grid = build_page(rows=60, seed=seed)
+            self.assertEqual(
+                DataExtractor.extract_data_using_grid(text_blocks, grid),
+                extract_linear(text_blocks, grid),
+            )
+
+
+class DateValidatorTests(SimpleTestCase):
+    def test_agrees_with_a_plain_dateutil_parse(self):
+        for cell in STATEMENT_CELLS:
+            with self.subTest(cell=cell):
+                self.assertEqual(
+                    DateValidator.is_valid_date(cell), dateutil_finds_date(cell)
+                )
+
+    def test_common_formats_and_rejections(self):
+        self.assertTrue(DateValidator.is_valid_date("01-Sep-2022"))
+        self.assertTrue(DateValidator.is_valid_date("Sep 01, 2022"))
+        self.assertFalse(DateValidator.is_valid_date("Opening balance"))
+        self.assertFalse(DateValidator.is_valid_date("31/02/2022"))
+
+    def test_non_strings_are_not_dates(self):
+        for value in (None, 20220901, 1.5, ["01-Sep-2022"]):
+            with self.subTest(value=value):
+                self.assertFalse(DateValidator.is_valid_date(value))
+
+    def test_valid_dates_checks_each_string(self):
+        self.assertEqual(
+            DateValidator.valid_dates(["01-Sep-2022", "Total", None, "4 Jul"]),
+            [True, False, False, True],
+        )
+
+    def test_repeated_cells_are_memoized(self):
+        _is_valid_date.cache_clear()
+        DateValidator.valid_dates(["Opening balance", "27-Oct"] * 3)
+        info = _is_valid_date.cache_info()
+        self.assertEqual((info.misses, info.hits), (2, 4))